@@ -9,8 +9,18 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
+from django.core.exceptions import ImproperlyConfigured
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'travel_planner_backend.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'travel_planner_backend.settings_asgi')
 
 application = get_asgi_application()
+
+# Streaming responses and the async HTTP client depend on it, and
+# persistent connections must be off (see settings_asgi.py)
+if not settings.SERVING_ASGI:
+    raise ImproperlyConfigured(
+        'The ASGI application needs SERVING_ASGI = True; use travel_planner_backend.settings_asgi '
+        'or a settings module based on it.'
+    )
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'trips.middleware.MetricsMiddleware',
+    'trips.middleware.TracingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -77,13 +80,174 @@ WSGI_APPLICATION = 'travel_planner_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# SQLite tuning applied to every new connection (trips/db.py). The
+# production profile uses WAL so readers no longer block behind the writer,
+# waits for locks instead of failing with "database is locked", and keeps
+# connections open between requests. It is opt-in with
+# TRIPS_SQLITE_PROFILE=production: WAL is stored in the database file and
+# adds -wal/-shm files next to it. The default profile keeps SQLite's own
+# settings and a connection per request.
+SQLITE_PROFILES = {
+    'default': {
+        'PRAGMAS': {},
+        'CONN_MAX_AGE': 0,
+    },
+    'production': {
+        'PRAGMAS': {
+            'journal_mode': 'WAL',      # persistent: stored in the database file
+            'synchronous': 'NORMAL',    # no fsync per commit; WAL stays consistent, a power cut may drop the last commits
+            'busy_timeout': 5000,       # ms a connection waits for a lock before "database is locked"
+            'cache_size': -65536,       # page cache per connection; negative is KiB (64 MB)
+            'mmap_size': 268435456,     # bytes of the file read through a memory map (256 MB)
+            'temp_store': 'MEMORY',     # temporary tables and indices for sorts in memory
+        },
+        'CONN_MAX_AGE': 600,            # seconds a connection is reused across requests
+    },
+}
+SQLITE = SQLITE_PROFILES[os.environ.get('TRIPS_SQLITE_PROFILE', 'default')]
+
+# True only in settings_asgi.py, the settings module of the ASGI application
+# (asgi.py); it also turns persistent connections off
+SERVING_ASGI = False
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': SQLITE['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Caches
+# 'shared' is visible to every worker process on this host; point it at
+# Redis or Memcached when running on several hosts.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    },
+}
+
+# Outbound provider HTTP client (trips/http_client.py)
+PROVIDER_HTTP = {
+    'CONNECT_TIMEOUT': 3.05,    # seconds
+    'READ_TIMEOUT': 10,         # seconds
+    'RETRIES': 2,               # retries for connection errors and retryable statuses of idempotent calls
+    'BACKOFF_FACTOR': 0.3,      # sleeps 0.3s, 0.6s, ... between retries
+    'POOL_CONNECTIONS': 10,     # number of provider hosts to keep pools for
+    'POOL_MAXSIZE': 20,         # keep-alive connections per host
+}
+
+# In-process cache of Amadeus flight offers, keyed by normalized search
+FLIGHT_OFFER_CACHE = {
+    'MAXSIZE': 1024,            # entries, least recently used are evicted
+    'TTL': 300,                 # seconds
+    'NEGATIVE_TTL': 60,         # seconds a search with no offers is remembered
+}
+
+# Concurrent flight searches (batch endpoint)
+FLIGHT_SEARCH = {
+    'MAX_CONCURRENCY': 8,       # upstream searches in flight at once, per process
+    'BATCH_MAX_SIZE': 25,       # searches accepted in one batch request
+    'CALENDAR_MAX_FLEX_DAYS': 3,  # price calendar covers at most (2*3+1)^2 date pairs
+}
+
+# Upstream Amadeus searches per process (token bucket). Searches that can't
+# get a token within MAX_WAIT seconds are skipped.
+AMADEUS_RATE_LIMIT = {
+    'RATE': 10,                 # searches per second
+    'BURST': 10,
+    'MAX_WAIT': 5.0,            # seconds
+}
+
+# Stop calling Amadeus after FAILURE_THRESHOLD failures within WINDOW seconds;
+# after COOLDOWN seconds, HALF_OPEN_PROBES searches test whether it recovered
+AMADEUS_CIRCUIT_BREAKER = {
+    'FAILURE_THRESHOLD': 5,
+    'WINDOW': 30,               # seconds
+    'COOLDOWN': 30,             # seconds
+    'HALF_OPEN_PROBES': 1,
+}
+
+# Rendered trip detail responses (trips/response_cache.py); entries are keyed
+# by the trip's updated_at and details version, so stale ones are never served
+TRIP_RESPONSE_CACHE = {
+    'ALIAS': 'default',
+    'TTL': 600,                 # seconds
+}
+
+# In-process cache of generated weather days shared by all trips (WeatherService)
+WEATHER_CACHE = {
+    'MAXSIZE': 20000,           # (city, day) entries, least recently used are evicted
+    'TTL': 6 * 60 * 60,         # seconds
+}
+
+# Places-of-interest catalog (trips/places.py); a JSON list of places, or the
+# built-in default catalog when CATALOG_PATH is None
+PLACES = {
+    'CATALOG_PATH': None,
+    'TOP_K': 10,
+}
+
+# Hotel catalog (trips/hotels.py); a JSON list of hotels with a 'city' each.
+# Cities missing from it get generated stand-in hotels if GENERATE_MISSING;
+# the most recently used ones are kept in GENERATED_CACHE
+HOTELS = {
+    'CATALOG_PATH': None,
+    'GENERATE_MISSING': True,
+    'GENERATED_CACHE': {
+        'MAXSIZE': 256,             # cities, least recently used are evicted
+        'TTL': 24 * 60 * 60,        # seconds
+    },
+    'TOP_K': 10,
+    'MAX_LIMIT': 100,
+}
+
+# NDJSON bulk import/export of trips (trips/bulk.py)
+TRIP_BULK = {
+    'CHUNK_SIZE': 500,          # rows validated and written per transaction / read per query
+}
+
+# Request/provider metrics (trips/metrics.py), served at /metrics
+METRICS = {
+    'SERVER_TIMING': True,      # add a Server-Timing header to every response
+}
+
+# Sampled detailed tracing (trips/tracing.py): SAMPLE_RATE is the fraction of
+# requests traced; a request with FORCE_HEADER set to 1 is always traced
+TRACING = {
+    'SAMPLE_RATE': float(os.environ.get('TRIPS_TRACE_SAMPLE_RATE', '0')),
+    'FORCE_HEADER': 'X-Trace' if DEBUG else None,
+}
+
+# Structured (JSON lines) logging with per-module levels
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'structured': {'()': 'trips.tracing.StructuredFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'structured'},
+    },
+    'loggers': {
+        'trips': {'handlers': ['console'], 'level': os.environ.get('TRIPS_LOG_LEVEL', 'INFO'), 'propagate': False},
+        'trips.services': {'level': 'INFO'},
+        'trips.jobs': {'level': 'INFO'},
+        'trips.views': {'level': 'WARNING'},
+        # Only sampled requests reach this logger
+        'trips.trace': {'level': 'INFO'},
+    },
+}
+
+# Cache alias holding the Amadeus OAuth access token
+AMADEUS_TOKEN_CACHE = 'shared'
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -129,6 +293,11 @@ CORS_ALLOWED_METHODS = [
 ]
 
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        # Splices pre-encoded TripDetail JSON into responses without re-encoding it
+        'trips.renderers.SplicingJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
@@ -138,6 +307,37 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Trips list keyset pagination (trips/pagination.py); clients may pass ?page_size=
+TRIPS_PAGE_SIZE = 20
+TRIPS_MAX_PAGE_SIZE = 100
+
+# Trip enrichment (weather, hotels and places lookups run concurrently)
+TRIP_ENRICHMENT = {
+    'MAX_WORKERS': 12,          # shared thread pool size
+    'PROVIDER_TIMEOUT': 5.0,    # seconds, default per-provider timeout
+    'PROVIDER_TIMEOUTS': {},    # per-provider overrides, e.g. {'hotels': 8.0}
+    'DEADLINE': 8.0,            # seconds, overall deadline for one trip
+    # Seconds after which a fetched section is refreshed; None never expires
+    'SECTION_TTLS': {
+        'weather': 3 * 60 * 60,
+        'hotels': 60 * 60,
+        'places': 7 * 24 * 60 * 60,
+    },
+    # Serve stale sections and refresh them in the background instead of inline
+    'STALE_WHILE_REVALIDATE': True,
+}
+
+# Background enrichment jobs (trips/jobs.py). Set IN_PROCESS_WORKER to False
+# when running `manage.py run_enrichment_worker` as a separate process.
+ENRICHMENT_JOBS = {
+    'IN_PROCESS_WORKER': True,
+    'POLL_INTERVAL': 2.0,       # seconds between queue polls when idle
+    'MAX_ATTEMPTS': 3,
+    'RETRY_DELAY': 30,          # seconds, multiplied by the attempt number
+    'LEASE_TIMEOUT': 300,       # seconds before a stuck 'running' job is requeued
+    'MAX_WAIT': 30,             # seconds a client may block on details-status?wait=
+}
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
@@ -0,0 +1,12 @@
+"""
+Settings for the ASGI application (asgi.py): the regular settings, plus the
+changes serving through ASGI needs.
+"""
+from .settings import *  # noqa: F401,F403
+
+SERVING_ASGI = True
+
+# Async views run their queries on per-request threads, so persistent
+# connections are never reused and leak; Django recommends disabling them
+# under ASGI.
+DATABASES = {**DATABASES, 'default': {**DATABASES['default'], 'CONN_MAX_AGE': 0}}
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Trip, TripDetail
+from .models import Trip, TripDetail, EnrichmentJob
 
 # Register your models here.
 
@@ -10,4 +10,10 @@ class TripAdmin(admin.ModelAdmin):
 
 @admin.register(TripDetail)
 class TripDetailAdmin(admin.ModelAdmin):
-    list_display = ('trip',)
+    list_display = ('trip', 'status')
+    list_filter = ('status',)
+
+@admin.register(EnrichmentJob)
+class EnrichmentJobAdmin(admin.ModelAdmin):
+    list_display = ('trip', 'status', 'attempts', 'run_after', 'updated_at')
+    list_filter = ('status',)
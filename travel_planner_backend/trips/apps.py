@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+from .db import configure_sqlite
+
+
+def install_query_metrics(sender, connection, **kwargs):
+    # On the connection itself rather than per request: under ASGI, queries
+    # run on a different thread (and connection) than the middleware
+    from .metrics import record_query
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
 
 
 class TripsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trips'
+
+    def ready(self):
+        connection_created.connect(configure_sqlite, dispatch_uid='trips.configure_sqlite')
+        connection_created.connect(install_query_metrics, dispatch_uid='trips.install_query_metrics')
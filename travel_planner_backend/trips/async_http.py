@@ -0,0 +1,98 @@
+"""
+Async HTTP client for outbound provider calls made from async views.
+
+Under ASGI (settings.SERVING_ASGI, see settings_asgi.py) the process
+shares one httpx.AsyncClient whose connection pool and timeouts follow
+settings.PROVIDER_HTTP, so a worker process can keep many provider requests
+in flight without a thread each. Retries follow the sync client: connection
+errors, and retryable statuses of idempotent requests, with the same
+exponential backoff; read timeouts are not retried. The client belongs to
+the server's event loop; a call from any other loop gets a client of its
+own that is closed when the call returns.
+
+httpx is a declared dependency (requirements.txt). Under WSGI, where every
+async view runs in a new event loop so no pool would outlive a request, or
+if httpx is missing, requests go through the shared sync session (see
+http_client.py) on a worker thread.
+
+Both return objects with `status_code`, `headers`, `text` and `json()`.
+"""
+import asyncio
+import contextlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import http_client
+
+try:
+    import httpx
+except ImportError:  # optional: fall back to the sync client on a thread
+    httpx = None
+
+_client = None
+_client_loop = None
+
+
+def _build_client():
+    config = settings.PROVIDER_HTTP
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(config['READ_TIMEOUT'], connect=config['CONNECT_TIMEOUT']),
+        limits=httpx.Limits(
+            max_connections=config['POOL_CONNECTIONS'] * config['POOL_MAXSIZE'],
+            max_keepalive_connections=config['POOL_MAXSIZE'],
+        ),
+    )
+
+
+@contextlib.asynccontextmanager
+async def _get_client():
+    """The process-wide client from its own event loop, else a client closed after use."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop.is_closed():
+        _client, _client_loop = _build_client(), loop
+    if _client_loop is loop:
+        yield _client
+    else:
+        async with _build_client() as client:
+            yield client
+
+
+async def aclose():
+    """Close the process-wide client, e.g. on server shutdown."""
+    global _client, _client_loop
+    if _client is not None:
+        client, _client, _client_loop = _client, None, None
+        await client.aclose()
+
+
+async def request(method, url, **kwargs):
+    """Send a request without blocking the event loop; retries idempotent calls like http_client."""
+    if httpx is None or not settings.SERVING_ASGI:
+        return await sync_to_async(http_client.request, thread_sensitive=False)(method, url, **kwargs)
+
+    config = settings.PROVIDER_HTTP
+    retry = method.upper() in http_client.IDEMPOTENT_METHODS
+    attempt = 0
+    while True:
+        try:
+            async with _get_client() as client:
+                response = await client.request(method, url, **kwargs)
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            # Nothing was sent, so even non-idempotent requests are safe to retry
+            if attempt >= config['RETRIES']:
+                raise
+        else:
+            if not retry or attempt >= config['RETRIES'] or response.status_code not in http_client.RETRY_STATUSES:
+                return response
+        await asyncio.sleep(config['BACKOFF_FACTOR'] * (2 ** attempt))
+        attempt += 1
+
+
+async def get(url, **kwargs):
+    return await request('GET', url, **kwargs)
+
+
+async def post(url, **kwargs):
+    return await request('POST', url, **kwargs)
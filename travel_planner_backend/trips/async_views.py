@@ -0,0 +1,115 @@
+"""
+Async versions of the trip retrieve and flight search endpoints.
+
+They behave like TripViewSet.retrieve and views.search_flights but use the
+async ORM and await provider calls, so under the ASGI application one worker
+process serves many requests while their provider calls are in flight.
+DRF views are sync-only, so these are plain Django views returning JSON.
+Under WSGI they still work, one event loop per request.
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse
+
+from . import response_cache
+from .jobs import enqueue_enrichment
+from .models import Trip, TripDetail
+from .renderers import SplicingJSONRenderer
+from .serializers import TripSerializer
+from .services import FlightService, TripEnrichmentService
+
+logger = logging.getLogger(__name__)
+
+JSON_CONTENT_TYPE = 'application/json'
+
+
+def not_found():
+    return JsonResponse({'detail': 'Not found.'}, status=404)
+
+
+async def trip_detail(request, pk):
+    """Get a single trip with all its details"""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    # Serve the pre-rendered response while neither the trip nor its details changed
+    current = await response_cache.afingerprint(pk)
+    if current is None:
+        return not_found()
+    content = await response_cache.aget(pk, current)
+    if content is not None:
+        return HttpResponse(content, content_type=JSON_CONTENT_TYPE)
+
+    try:
+        trip = await Trip.objects.select_related('details').aget(pk=pk)
+    except Trip.DoesNotExist:
+        return not_found()
+
+    created = False
+    trip_detail = getattr(trip, 'details', None)
+    if trip_detail is None:
+        trip_detail, created = await TripDetail.objects.aget_or_create(trip=trip)
+        trip.details = trip_detail
+
+    # Same refresh rules as TripViewSet.retrieve
+    if created or (not trip_detail.has_fetched() and trip_detail.status != TripDetail.STATUS_PENDING):
+        await refresh_details(trip, trip_detail)
+    elif trip_detail.status != TripDetail.STATUS_PENDING:
+        stale = TripEnrichmentService.stale_providers(trip_detail)
+        if stale and settings.TRIP_ENRICHMENT['STALE_WHILE_REVALIDATE']:
+            await sync_to_async(enqueue_enrichment)(trip, stale, mark_pending=False)
+        elif stale:
+            await refresh_details(trip, trip_detail, stale)
+
+    content = SplicingJSONRenderer().render(TripSerializer(trip).data)
+    await response_cache.astore(trip.pk, (trip.updated_at, trip_detail.version), content)
+    return HttpResponse(content, content_type=JSON_CONTENT_TYPE)
+
+
+async def refresh_details(trip, trip_detail, providers=None):
+    """Fetch `providers` (default: all) and save whatever came back."""
+    try:
+        results = await TripEnrichmentService.aenrich(trip, providers)
+        updated_fields = TripEnrichmentService.apply(trip_detail, results)
+        if updated_fields:
+            trip_detail.status = TripDetail.STATUS_READY
+            await trip_detail.asave(update_fields=updated_fields + ['status'])
+    except Exception:
+        logger.exception("Error fetching details for trip %s", trip.id)
+
+
+async def search_flights(request):
+    """Search for flights using Amadeus API"""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    origin = data.get('origin')
+    destination = data.get('destination')
+    departure_date = data.get('departure_date')
+    return_date = data.get('return_date')
+    if not all([origin, destination, departure_date]):
+        return JsonResponse({'error': 'Missing required parameters'}, status=400)
+
+    try:
+        flight_data = await FlightService.aget_flight_offers(
+            origin=origin,
+            destination=destination,
+            departure_date=departure_date,
+            return_date=return_date
+        )
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse(flight_data)
+
+
+# Like the DRF views, which are CSRF-exempt; Django 4.2's csrf_exempt can't wrap async views
+search_flights.csrf_exempt = True
@@ -0,0 +1,136 @@
+"""
+Bulk NDJSON import and export of trips.
+
+Import validates each line with TripSerializer and writes a chunk at a time
+with bulk_create (trips, their details and enrichment jobs) in a single
+transaction per chunk. Enrichment is never run inline: trips without
+imported details are queued for the background worker.
+
+Export walks the table by primary key in chunks (keyset, never OFFSET) and
+yields one JSON line per trip, so memory use is bounded by the chunk size.
+"""
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .jobs import wake_worker
+from .models import EnrichmentJob, Trip, TripDetail
+from .renderers import SplicingJSONRenderer
+from .serializers import TripSerializer
+from .services import TripEnrichmentService
+
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []    # first MAX_REPORTED_ERRORS of {'line': n, 'errors': ...}
+
+    def add_error(self, line_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'errors': errors})
+
+    def as_dict(self):
+        return {'imported': self.imported, 'failed': self.failed, 'errors': self.errors}
+
+
+def _parse_lines(lines, result):
+    """Yield (line number, dict) for every non-blank line, recording unparseable ones."""
+    for line_number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            result.add_error(line_number, f"Invalid JSON: {str(e)}")
+            continue
+        if not isinstance(row, dict):
+            result.add_error(line_number, 'Expected a JSON object')
+            continue
+        yield line_number, row
+
+
+def _write_chunk(rows):
+    """Insert one chunk of validated rows; returns the number of trips written."""
+    trips = []
+    details = []
+    for data in rows:
+        details_data = data.pop('details', None) or {}
+        trips.append(Trip(**data))
+        details.append({field: details_data.get(field) for field in TripDetail.JSON_FIELDS})
+
+    # Imported sections, even empty ones, count as fetched now; the others are left for the worker
+    now = timezone.now()
+    fetched_at = {field: TripEnrichmentService.FETCHED_AT[name] for name, field in TripEnrichmentService.FIELDS.items()}
+
+    with transaction.atomic():
+        Trip.objects.bulk_create(trips)
+        trip_details = []
+        for trip, detail in zip(trips, details):
+            fetched = [field for field, value in detail.items() if value is not None]
+            trip_details.append(TripDetail(
+                trip=trip,
+                status=TripDetail.STATUS_READY if fetched else TripDetail.STATUS_PENDING,
+                **detail,
+                **{fetched_at[field]: now for field in fetched}
+            ))
+        TripDetail.objects.bulk_create(trip_details)
+        jobs = [
+            EnrichmentJob(trip=trip_detail.trip)
+            for trip_detail in trip_details if trip_detail.status == TripDetail.STATUS_PENDING
+        ]
+        EnrichmentJob.objects.bulk_create(jobs)
+        if jobs:
+            transaction.on_commit(wake_worker)
+    return len(trips)
+
+
+def import_trips(lines, chunk_size=None):
+    """Import trips from an iterable of NDJSON lines (str or bytes).
+
+    Invalid lines are skipped and reported; every valid chunk is committed
+    on its own, so a failure late in the file keeps earlier chunks.
+    """
+    chunk_size = chunk_size or settings.TRIP_BULK['CHUNK_SIZE']
+    result = ImportResult()
+    chunk = []
+    for line_number, row in _parse_lines(lines, result):
+        serializer = TripSerializer(data=row)
+        if not serializer.is_valid():
+            result.add_error(line_number, serializer.errors)
+            continue
+        chunk.append(dict(serializer.validated_data))
+        if len(chunk) >= chunk_size:
+            result.imported += _write_chunk(chunk)
+            chunk = []
+    if chunk:
+        result.imported += _write_chunk(chunk)
+    return result
+
+
+def export_trips(queryset=None, chunk_size=None):
+    """Yield every trip in `queryset` (default: all) as a UTF-8 NDJSON line, in id order."""
+    chunk_size = chunk_size or settings.TRIP_BULK['CHUNK_SIZE']
+    queryset = (queryset if queryset is not None else Trip.objects.all()).prefetch_related(
+        # Stored detail JSON is spliced into each line without being decoded
+        Prefetch('details', queryset=TripDetail.objects.with_raw_json())
+    ).order_by('id')
+    renderer = SplicingJSONRenderer()
+
+    last_id = 0
+    while True:
+        trips = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not trips:
+            return
+        for trip in trips:
+            yield renderer.render(TripSerializer(trip).data) + b'\n'
+        last_id = trips[-1].id
@@ -0,0 +1,97 @@
+"""
+Circuit breaker for calls to an unreliable upstream provider.
+"""
+import threading
+import time
+from collections import deque
+
+
+class CircuitBreaker:
+    """Stop calling a provider after repeated failures, then probe for recovery.
+
+    closed:    calls go through; `failure_threshold` failures within `window`
+               seconds open the circuit.
+    open:      calls are rejected (allow() is False) for `cooldown` seconds.
+    half_open: up to `half_open_probes` calls go through; a success closes
+               the circuit, a failure opens it for another cool-down. A
+               probe that never reports back is replaced after `cooldown`.
+
+    State is per process.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, window, cooldown, half_open_probes=1):
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.cooldown = cooldown
+        self.half_open_probes = half_open_probes
+        self.rejected = 0
+        self._state = self.CLOSED
+        self._failures = deque()    # monotonic times of recent failures
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probed_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now):
+        if self._state == self.OPEN and now - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow(self):
+        """True if a call may go to the provider now."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN:
+                if self._probes >= self.half_open_probes and now - self._probed_at >= self.cooldown:
+                    self._probes = 0
+                if self._probes < self.half_open_probes:
+                    self._probes += 1
+                    self._probed_at = now
+                    return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures.clear()
+
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._current_state(now) == self.HALF_OPEN:
+                self._open(now)
+                return
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.window:
+                self._failures.popleft()
+            if len(self._failures) >= self.failure_threshold:
+                self._open(now)
+
+    def _open(self, now):
+        self._state = self.OPEN
+        self._opened_at = now
+        self._failures.clear()
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            return {
+                'state': state,
+                'recent_failures': len(self._failures),
+                'rejected': self.rejected,
+                'retry_in': round(max(self._opened_at + self.cooldown - now, 0), 1) if state == self.OPEN else 0,
+            }
@@ -0,0 +1,89 @@
+"""
+Process-wide thread pools for fanning out provider calls.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name, max_workers):
+    """Return the shared, bounded thread pool called `name`, creating it on first use."""
+    executor = _executors.get(name)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(name)
+            if executor is None:
+                executor = _executors[name] = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix=name
+                )
+    return executor
+
+
+def submit(executor, fn, *args, **kwargs):
+    """executor.submit() that runs `fn` in a copy of the caller's context.
+
+    Context variables, such as the current request's metrics, then follow
+    the call into the pool thread.
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` calls per second, in bursts of up to `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        # Take a token if one is available (returns 0), else return the seconds until one is
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def _next_wait(self, deadline):
+        # None: got a token; False: out of time; otherwise seconds to sleep before retrying
+        wait = self._take()
+        if not wait:
+            return None
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            wait = min(wait, remaining)
+        return wait
+
+    def acquire(self, timeout=None):
+        """Take one token, waiting up to `timeout` seconds; return False if none came."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._next_wait(deadline)
+            if wait is None:
+                return True
+            if wait is False:
+                return False
+            time.sleep(wait)
+
+    async def aacquire(self, timeout=None):
+        """acquire() for coroutines: waits without blocking the event loop."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._next_wait(deadline)
+            if wait is None:
+                return True
+            if wait is False:
+                return False
+            await asyncio.sleep(wait)
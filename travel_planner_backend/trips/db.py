@@ -0,0 +1,29 @@
+"""
+SQLite connection tuning.
+
+PRAGMAs are per connection (journal_mode=WAL is also stored in the file),
+so TripsConfig runs configure_sqlite() on every new connection. They come
+from settings.SQLITE['PRAGMAS']; with CONN_MAX_AGE set, a connection and its
+PRAGMAs are reused across requests rather than set up for each one.
+"""
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver applying settings.SQLITE['PRAGMAS'] to SQLite connections."""
+    if connection.vendor != 'sqlite':
+        return
+    # On the raw connection: these are setup, not queries of the current request
+    for name, value in settings.SQLITE['PRAGMAS'].items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def pragma_values(connection, names):
+    """Current value of each PRAGMA on `connection`, e.g. to check what a profile applied."""
+    with connection.cursor() as cursor:
+        values = {}
+        for name in names:
+            cursor.execute(f'PRAGMA {name}')
+            row = cursor.fetchone()
+            values[name] = row[0] if row else None
+        return values
@@ -0,0 +1,155 @@
+"""
+Hotel catalog indexed for budget and amenity queries.
+
+Each city's hotels are held in parallel arrays sorted by price per night,
+so a budget range is two bisections; amenities are stored as bitmasks, so
+"has Pool and Gym" is a single AND per hotel. The catalog is loaded once per
+process from settings.HOTELS['CATALOG_PATH']; cities missing from it get a
+deterministic set of generated hotels. Any city name can be looked up, so
+generated cities are kept in a bounded cache rather than in the index.
+"""
+import heapq
+import json
+import random
+import threading
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+
+from .caching import TTLCache
+from .weather import city_seed
+
+AMENITIES = ['WiFi', 'Pool', 'Spa', 'Gym', 'Restaurant', 'Bar', 'Room Service', 'Parking']
+AMENITY_BITS = {name.lower(): 1 << bit for bit, name in enumerate(AMENITIES)}
+
+SORT_RATING = 'rating'
+SORT_PRICE = 'price'
+
+GENERATED_NAMES = ['Grand Hotel', 'City Center Inn', 'Luxury Resort', 'Business Hotel', 'Boutique Stay']
+GENERATED_PER_CITY = 40
+
+
+def amenity_mask(names):
+    """Bitmask for amenity names; raises ValueError for an unknown amenity."""
+    mask = 0
+    for name in names:
+        try:
+            mask |= AMENITY_BITS[name.strip().lower()]
+        except KeyError:
+            raise ValueError(f"Unknown amenity: {name}")
+    return mask
+
+
+def amenity_names(mask):
+    return [name for name in AMENITIES if mask & AMENITY_BITS[name.lower()]]
+
+
+def normalize_city(city):
+    return ' '.join((city or '').lower().split())
+
+
+def generate_hotels(city):
+    """Deterministic stand-in hotels for a city that is not in the catalog."""
+    rng = random.Random(city_seed(city))
+    hotels = []
+    for n in range(GENERATED_PER_CITY):
+        branch, number = divmod(n, len(GENERATED_NAMES))
+        name = f"{GENERATED_NAMES[number]} {city}"
+        hotels.append({
+            'name': f"{name} {branch + 1}" if branch else name,
+            'address': f"{rng.randint(1, 999)} Main Street, {city}",
+            'rating': round(rng.uniform(3.0, 5.0), 1),
+            'price_per_night': rng.randint(60, 400),
+            'currency': 'USD',
+            'image': f"https://picsum.photos/400/{305 + number}",
+            'amenities': rng.sample(AMENITIES, rng.randint(3, 6)),
+            'description': 'A wonderful hotel in a prime location with excellent service and modern amenities.',
+            'available_rooms': rng.randint(1, 10),
+            'city': city,
+        })
+    return hotels
+
+
+class _CityHotels:
+    """One city's hotels as parallel arrays sorted by price."""
+
+    def __init__(self, hotels):
+        hotels = sorted(hotels, key=lambda hotel: hotel['price_per_night'])
+        self.hotels = hotels
+        self.prices = [float(hotel['price_per_night']) for hotel in hotels]
+        self.ratings = [hotel.get('rating', 0) for hotel in hotels]
+        self.masks = [amenity_mask(hotel.get('amenities', ())) for hotel in hotels]
+
+
+class HotelIndex:
+    def __init__(self, hotels, generate_missing=True):
+        by_city = {}
+        for hotel in hotels:
+            by_city.setdefault(normalize_city(hotel.get('city')), []).append(hotel)
+        self._cities = {city: _CityHotels(city_hotels) for city, city_hotels in by_city.items()}
+        self._generate_missing = generate_missing
+        # Regenerating an evicted city gives the same hotels, so the cache only saves work
+        config = settings.HOTELS['GENERATED_CACHE']
+        self._generated = TTLCache(maxsize=config['MAXSIZE'], ttl=config['TTL'])
+
+    def __len__(self):
+        return sum(len(city.hotels) for city in self._cities.values())
+
+    def _city(self, city):
+        key = normalize_city(city)
+        city_hotels = self._cities.get(key)
+        if city_hotels is None and self._generate_missing and key:
+            city_hotels = self._generated.get(key)
+            if city_hotels is None:
+                city_hotels = _CityHotels(generate_hotels(city.strip()))
+                self._generated.set(key, city_hotels)
+        return city_hotels
+
+    def search(self, city, min_price=None, max_price=None, amenities=0, sort=SORT_RATING, limit=10):
+        """Return up to `limit` hotels in `city` within the price range having all `amenities`.
+
+        `amenities` is a bitmask (see amenity_mask()). Results are ordered by
+        rating (best first) or by price (cheapest first).
+        """
+        city_hotels = self._city(city)
+        if city_hotels is None:
+            return []
+
+        lo = 0 if min_price is None else bisect_left(city_hotels.prices, min_price)
+        hi = len(city_hotels.prices) if max_price is None else bisect_right(city_hotels.prices, max_price)
+        masks = city_hotels.masks
+        matches = (i for i in range(lo, hi) if masks[i] & amenities == amenities)
+
+        if sort == SORT_PRICE:
+            # Already in price order, so stop after the first `limit` matches
+            positions = []
+            for i in matches:
+                positions.append(i)
+                if len(positions) == limit:
+                    break
+        else:
+            ratings = city_hotels.ratings
+            positions = heapq.nlargest(limit, matches, key=lambda i: (ratings[i], -i))
+        return [city_hotels.hotels[i] for i in positions]
+
+
+def load_catalog():
+    path = settings.HOTELS['CATALOG_PATH']
+    if not path:
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Return the process-wide hotel index, building it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = HotelIndex(load_catalog(), generate_missing=settings.HOTELS['GENERATE_MISSING'])
+    return _index
@@ -0,0 +1,79 @@
+"""
+Shared HTTP client for outbound provider calls (Amadeus, Google Places, ...).
+
+One requests.Session is shared by the whole process. Its connection pools
+keep TCP/TLS connections to each provider host alive between requests; every
+call gets connect/read timeouts, and idempotent calls are retried with
+exponential backoff. Settings live in settings.PROVIDER_HTTP.
+
+Retries are kept short so a struggling provider cannot hold a worker: a
+read timeout is not retried (a provider that hung once is likely to hang
+again, and each attempt costs the full READ_TIMEOUT), and a Retry-After
+header is ignored in favour of the backoff, so a 429 reaches the caller
+(and the Amadeus circuit breaker) within a second.
+"""
+import threading
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Only these are retried on read errors and retryable status codes
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    config = settings.PROVIDER_HTTP
+    retry = Retry(
+        total=config['RETRIES'],
+        read=0,
+        backoff_factor=config['BACKOFF_FACTOR'],
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    # urllib3 keeps one pool per host; pool_maxsize is the keep-alive connections per host
+    adapter = HTTPAdapter(
+        pool_connections=config['POOL_CONNECTIONS'],
+        pool_maxsize=config['POOL_MAXSIZE'],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide provider session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def default_timeout():
+    config = settings.PROVIDER_HTTP
+    return (config['CONNECT_TIMEOUT'], config['READ_TIMEOUT'])
+
+
+def request(method, url, **kwargs):
+    """Send a request through the shared session with the default timeouts."""
+    kwargs.setdefault('timeout', default_timeout())
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
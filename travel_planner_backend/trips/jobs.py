@@ -0,0 +1,182 @@
+"""
+Background enrichment jobs backed by the EnrichmentJob table.
+
+Views only commit the Trip and queue a job; a local worker (either the
+in-process worker thread or `manage.py run_enrichment_worker`) claims queued
+jobs and fetches weather, hotels and places outside the request transaction.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EnrichmentJob, TripDetail
+from .services import TripEnrichmentService
+
+logger = logging.getLogger(__name__)
+
+
+def _merge_providers(queued, providers):
+    # An empty list means every provider
+    if not queued or not providers:
+        return []
+    return sorted(set(queued) | set(providers))
+
+
+def enqueue_enrichment(trip, providers=None, mark_pending=True):
+    """Queue an enrichment job for the trip's `providers` (default: all of them).
+
+    With `mark_pending` the details are flagged pending until the job ran;
+    without it (stale-while-revalidate) the current details keep being served
+    as they are. A job already queued for the trip is widened instead of
+    queueing another. Call inside the transaction that saves the trip; the
+    in-process worker is woken only once that transaction commits.
+    """
+    providers = list(providers or [])
+    if mark_pending:
+        TripDetail.objects.update_or_create(trip=trip, defaults={'status': TripDetail.STATUS_PENDING})
+
+    queued = EnrichmentJob.objects.filter(
+        trip=trip, status=EnrichmentJob.STATUS_QUEUED
+    ).values_list('id', 'providers').first()
+    merged = None
+    if queued is not None:
+        job_id, queued_providers = queued
+        merged = _merge_providers(queued_providers, providers)
+        # Only widen the job while it is still queued; a claimed job gets a successor
+        if merged != queued_providers and not EnrichmentJob.objects.filter(
+            id=job_id, status=EnrichmentJob.STATUS_QUEUED
+        ).update(providers=merged):
+            merged = None
+    if merged is None:
+        EnrichmentJob.objects.create(trip=trip, providers=providers)
+    transaction.on_commit(wake_worker)
+
+
+def enqueue_missing_details(trips):
+    """Create pending TripDetail rows and jobs for trips that have no details.
+
+    Uses one bulk_create per table regardless of how many trips are passed;
+    the trips' details must already be loaded (select_related or prefetch_related).
+    Another request may create the same details concurrently, so conflicts
+    are ignored and the details are read back instead of trusting the
+    objects bulk_create returns.
+    """
+    missing = [trip for trip in trips if not hasattr(trip, 'details')]
+    if not missing:
+        return
+    with transaction.atomic():
+        TripDetail.objects.bulk_create([TripDetail(trip=trip) for trip in missing], ignore_conflicts=True)
+        # Jobs have no unique key: a racing request may queue a second job, which only refreshes the trip twice
+        EnrichmentJob.objects.bulk_create([EnrichmentJob(trip=trip) for trip in missing], ignore_conflicts=True)
+        transaction.on_commit(wake_worker)
+    details = TripDetail.objects.in_bulk([trip.pk for trip in missing], field_name='trip_id')
+    for trip in missing:
+        trip_detail = details.get(trip.pk)
+        # None if the trip was deleted meanwhile; it serializes without details
+        if trip_detail is not None:
+            trip.details = trip_detail
+
+
+def claim_next_job():
+    """Atomically move the oldest runnable job to 'running' and return it, or None."""
+    config = settings.ENRICHMENT_JOBS
+    now = timezone.now()
+
+    # Requeue jobs whose worker died mid-run
+    EnrichmentJob.objects.filter(
+        status=EnrichmentJob.STATUS_RUNNING,
+        updated_at__lt=now - timedelta(seconds=config['LEASE_TIMEOUT'])
+    ).update(status=EnrichmentJob.STATUS_QUEUED)
+
+    candidates = EnrichmentJob.objects.filter(
+        status=EnrichmentJob.STATUS_QUEUED, run_after__lte=now
+    ).order_by('run_after', 'id').values_list('id', flat=True)[:5]
+    for job_id in candidates:
+        # Compare-and-swap on status so two workers never run the same job
+        claimed = EnrichmentJob.objects.filter(
+            id=job_id, status=EnrichmentJob.STATUS_QUEUED
+        ).update(status=EnrichmentJob.STATUS_RUNNING, attempts=F('attempts') + 1, updated_at=now)
+        if claimed:
+            return EnrichmentJob.objects.select_related('trip').get(id=job_id)
+    return None
+
+
+def _finish(job, **fields):
+    # Update by id: the job row is gone if its trip was deleted mid-run
+    EnrichmentJob.objects.filter(id=job.id).update(updated_at=timezone.now(), **fields)
+
+
+def run_job(job):
+    """Enrich the job's trip and record the outcome on the job and TripDetail."""
+    config = settings.ENRICHMENT_JOBS
+    try:
+        results = TripEnrichmentService.enrich(job.trip, job.providers or None)
+        if all(data is None for data in results.values()):
+            raise RuntimeError("Every enrichment provider failed")
+
+        trip_detail, _ = TripDetail.objects.get_or_create(trip=job.trip)
+        updated_fields = TripEnrichmentService.apply(trip_detail, results)
+        trip_detail.status = TripDetail.STATUS_READY
+        trip_detail.save(update_fields=updated_fields + ['status'])
+        _finish(job, status=EnrichmentJob.STATUS_DONE, last_error='')
+    except Exception as e:
+        logger.warning("Enrichment job %s failed (attempt %s): %s", job.id, job.attempts, e)
+        if job.attempts < config['MAX_ATTEMPTS']:
+            retry_at = timezone.now() + timedelta(seconds=config['RETRY_DELAY'] * job.attempts)
+            _finish(job, status=EnrichmentJob.STATUS_QUEUED, last_error=str(e), run_after=retry_at)
+        else:
+            _finish(job, status=EnrichmentJob.STATUS_FAILED, last_error=str(e))
+            # Details refreshed in the background (still 'ready') keep serving their old data
+            TripDetail.objects.filter(trip_id=job.trip_id, status=TripDetail.STATUS_PENDING).update(
+                status=TripDetail.STATUS_FAILED, version=F('version') + 1
+            )
+
+
+def run_pending_jobs(limit=None):
+    """Run queued jobs until the queue is empty (or `limit` jobs ran); return the count."""
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
+
+
+_wakeup = threading.Event()
+_worker_thread = None
+_worker_lock = threading.Lock()
+
+
+def _worker_loop():
+    poll_interval = settings.ENRICHMENT_JOBS['POLL_INTERVAL']
+    while True:
+        _wakeup.wait(timeout=poll_interval)
+        _wakeup.clear()
+        try:
+            run_pending_jobs()
+        except Exception as e:
+            logger.exception("Enrichment worker error")
+        finally:
+            close_old_connections()
+
+
+def wake_worker():
+    """Start the in-process worker thread if enabled and tell it there is work."""
+    global _worker_thread
+    if not settings.ENRICHMENT_JOBS['IN_PROCESS_WORKER']:
+        return
+    if _worker_thread is None:
+        with _worker_lock:
+            if _worker_thread is None:
+                _worker_thread = threading.Thread(
+                    target=_worker_loop, name='enrichment-worker', daemon=True
+                )
+                _worker_thread.start()
+    _wakeup.set()
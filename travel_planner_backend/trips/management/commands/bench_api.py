@@ -0,0 +1,284 @@
+import contextlib
+import json
+import platform
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from unittest import mock
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.utils import timezone
+
+from trips.concurrency import RateLimiter
+from trips.models import Trip, TripDetail
+from trips.services import FlightService, HotelService, PlacesService, TripEnrichmentService, WeatherService
+
+SCENARIOS = ['list', 'retrieve', 'create', 'update', 'search-flights']
+PROVIDERS = ['weather', 'hotels', 'places', 'flights']
+DESTINATIONS = ['Paris', 'Rome', 'Tokyo', 'New York', 'Lisbon', 'Bangkok', 'Cape Town', 'Oslo']
+AIRPORTS = ['DEL', 'BOM', 'JFK', 'LHR', 'CDG', 'NRT']
+INTERESTS = ['art, museums', 'food', 'hiking and nature', 'history', 'nightlife, food']
+COMPARED_METRICS = ['p50_ms', 'p95_ms', 'p99_ms', 'queries_mean']
+
+# Isolated caches so runs neither read nor pollute the configured ones
+BENCH_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench-default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench-shared'},
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def parse_latency(value):
+    try:
+        name, ms = value.split('=', 1)
+        if name not in PROVIDERS:
+            raise ValueError
+        return name, float(ms)
+    except ValueError:
+        raise CommandError(f"--provider-latency expects one of {', '.join(PROVIDERS)}=<ms>, got {value!r}")
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the trips API against a throwaway test database with local, '
+        'latency-configurable provider fakes; reports latency percentiles, '
+        'throughput and query counts, optionally as JSON compared with a baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trips', type=int, default=1000, help='Trips seeded before measuring.')
+        parser.add_argument('--iterations', type=int, default=200, help='Timed requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per scenario.')
+        parser.add_argument(
+            '--scenarios', default=','.join(SCENARIOS),
+            help=f"Comma-separated subset of: {', '.join(SCENARIOS)}."
+        )
+        parser.add_argument('--latency', type=float, default=20, help='Fake provider latency in ms.')
+        parser.add_argument(
+            '--provider-latency', action='append', default=[], metavar='PROVIDER=MS',
+            help=f"Per-provider latency override ({', '.join(PROVIDERS)}); repeatable."
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', '-o', help='Write the results to this JSON file.')
+        parser.add_argument('--compare', help='Baseline JSON file from an earlier --output run.')
+        parser.add_argument(
+            '--threshold', type=float, default=10,
+            help='Percent increase over the baseline that counts as a regression.'
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Exit with an error when --compare finds a regression.'
+        )
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+        latencies = {name: options['latency'] for name in PROVIDERS}
+        latencies.update(parse_latency(value) for value in options['provider_latency'])
+        baseline = self._load(options['compare']) if options['compare'] else None
+
+        self.rng = random.Random(options['seed'])
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            jobs = {**settings.ENRICHMENT_JOBS, 'IN_PROCESS_WORKER': False}
+            with override_settings(CACHES=BENCH_CACHES, ENRICHMENT_JOBS=jobs), self._fake_providers(latencies):
+                FlightService._offer_cache.clear()
+                self._seed(options['trips'])
+                self.stdout.write(f"Seeded {options['trips']} trips; provider latency {latencies} ms")
+                results = {
+                    name: self._run(name, options['warmup'], options['iterations'])
+                    for name in scenarios
+                }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'trips': options['trips'],
+                'iterations': options['iterations'],
+                'latency_ms': latencies,
+                'seed': options['seed'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'scenarios': results,
+        }
+        self._print(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if baseline is not None:
+            regressions = self._compare(baseline, results, options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} regression(s) over {options['threshold']}%")
+
+    @contextlib.contextmanager
+    def _fake_providers(self, latencies):
+        """Replace provider calls with local implementations that sleep for the configured latency."""
+        def slow(name, fn):
+            def fake(*args, **kwargs):
+                time.sleep(latencies[name] / 1000)
+                return fn(*args, **kwargs)
+            return fake
+
+        with contextlib.ExitStack() as stack:
+            for cls, attr, name in [
+                (WeatherService, 'get_forecast', 'weather'),
+                (HotelService, 'get_hotel_recommendations', 'hotels'),
+                (PlacesService, 'get_places_of_interest', 'places'),
+            ]:
+                stack.enter_context(mock.patch.object(cls, attr, slow(name, getattr(cls, attr))))
+            # Amadeus is replaced by dummy offers; its rate limit would only measure the sleep
+            stack.enter_context(mock.patch.object(
+                FlightService, '_search_flight_offers', slow('flights', FlightService.get_dummy_flights)
+            ))
+            stack.enter_context(mock.patch.object(FlightService, '_rate_limiter', RateLimiter(1e9, 1e9)))
+            yield
+
+    def _trip_payload(self):
+        start = date.today() + timedelta(days=self.rng.randint(1, 90))
+        return {
+            'destination': self.rng.choice(DESTINATIONS),
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=self.rng.randint(2, 10))).isoformat(),
+            'budget': f"{self.rng.randint(300, 5000)}.00",
+            'interests': self.rng.choice(INTERESTS),
+        }
+
+    def _seed(self, count):
+        trips = []
+        for _ in range(count):
+            payload = self._trip_payload()
+            payload['start_date'] = date.fromisoformat(payload['start_date'])
+            payload['end_date'] = date.fromisoformat(payload['end_date'])
+            trips.append(Trip(**payload))
+        trips = Trip.objects.bulk_create(trips)
+        now = timezone.now()
+        fetched_at = {field: now for field in TripEnrichmentService.FETCHED_AT.values()}
+        # Seeded details are representative in size but skip the fake latency
+        sample = TripEnrichmentService.enrich(trips[0]) if trips else {}
+        TripDetail.objects.bulk_create([
+            TripDetail(
+                trip=trip, status=TripDetail.STATUS_READY, **fetched_at,
+                **{field: sample.get(name) for name, field in TripEnrichmentService.FIELDS.items()}
+            )
+            for trip in trips
+        ])
+        self.trip_ids = [trip.id for trip in trips]
+
+    def _request(self, client, name, state):
+        if name == 'list':
+            url = state.get('next') or '/api/trips/'
+            response = client.get(url)
+            state['next'] = response.json().get('next') if response.status_code == 200 else None
+            return response
+        if name == 'retrieve':
+            return client.get(f"/api/trips/{self.rng.choice(self.trip_ids)}/")
+        if name == 'create':
+            return client.post('/api/trips/', self._trip_payload(), content_type='application/json')
+        if name == 'update':
+            return client.patch(
+                f"/api/trips/{self.rng.choice(self.trip_ids)}/",
+                {'budget': f"{self.rng.randint(300, 5000)}.00"},
+                content_type='application/json'
+            )
+        departure = date.today() + timedelta(days=self.rng.randint(1, 60))
+        origin, destination = self.rng.sample(AIRPORTS, 2)
+        return client.post('/api/trips/search-flights/', {
+            'origin': origin,
+            'destination': destination,
+            'departure_date': departure.isoformat(),
+            'return_date': (departure + timedelta(days=7)).isoformat(),
+        }, content_type='application/json')
+
+    def _run(self, name, warmup, iterations):
+        client = Client()
+        state = {}
+        timings = []
+        query_counts = []
+        errors = 0
+        for _ in range(warmup):
+            self._request(client, name, state)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as queries:
+                request_started = time.perf_counter()
+                response = self._request(client, name, state)
+                timings.append((time.perf_counter() - request_started) * 1000)
+            query_counts.append(len(queries))
+            if response.status_code >= 400:
+                errors += 1
+        elapsed = time.perf_counter() - started
+
+        timings.sort()
+        return {
+            'iterations': iterations,
+            'errors': errors,
+            'mean_ms': round(statistics.mean(timings), 3),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'throughput_rps': round(iterations / elapsed, 1),
+            'queries_mean': round(statistics.mean(query_counts), 2),
+            'queries_max': max(query_counts),
+        }
+
+    def _print(self, results):
+        self.stdout.write(
+            f"{'scenario':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'queries':>10}{'errors':>8}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<16}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result['throughput_rps']:>10.1f}{result['queries_mean']:>10.2f}{result['errors']:>8}"
+            )
+
+    def _load(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read baseline {path}: {str(e)}")
+
+    def _compare(self, baseline, results, threshold):
+        """Print the change of each metric against the baseline; return the regressions."""
+        regressions = []
+        self.stdout.write(f"Compared with baseline from {baseline.get('meta', {}).get('timestamp', '?')}:")
+        for name, result in results.items():
+            before = baseline.get('scenarios', {}).get(name)
+            if not before:
+                self.stdout.write(f"  {name}: not in baseline")
+                continue
+            changes = []
+            for metric in COMPARED_METRICS:
+                old, new = before.get(metric), result[metric]
+                if not old:
+                    continue
+                change = (new - old) / old * 100
+                flag = ''
+                if change > threshold:
+                    flag = ' REGRESSION'
+                    regressions.append((name, metric, change))
+                changes.append(f"{metric} {old} -> {new} ({change:+.1f}%){flag}")
+            self.stdout.write(f"  {name}: " + '; '.join(changes))
+        return regressions
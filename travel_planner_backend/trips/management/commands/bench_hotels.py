@@ -0,0 +1,96 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from trips.hotels import AMENITIES, SORT_PRICE, SORT_RATING, HotelIndex, amenity_mask
+
+
+def synthetic_catalog(size, cities, rng):
+    return [
+        {
+            'name': f"Hotel {n}",
+            'rating': round(rng.uniform(2.5, 5.0), 1),
+            'price_per_night': rng.randint(40, 600),
+            'currency': 'USD',
+            'amenities': rng.sample(AMENITIES, rng.randint(2, 7)),
+            'city': f"City {rng.randrange(cities)}",
+        }
+        for n in range(size)
+    ]
+
+
+def linear_search(catalog, city, max_price, amenities, sort, limit):
+    """Reference implementation: filter and sort the whole catalog."""
+    city = city.lower()
+    required = set(amenities)
+    matches = [
+        hotel for hotel in catalog
+        if hotel['city'].lower() == city
+        and hotel['price_per_night'] <= max_price
+        and required.issubset(hotel['amenities'])
+    ]
+    if sort == SORT_PRICE:
+        matches.sort(key=lambda hotel: hotel['price_per_night'])
+    else:
+        matches.sort(key=lambda hotel: -hotel['rating'])
+    return matches[:limit]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark hotel budget/amenity queries against a large synthetic catalog.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotels', type=int, default=300000, help='Catalog size.')
+        parser.add_argument('--cities', type=int, default=200, help='Number of distinct cities.')
+        parser.add_argument('--queries', type=int, default=2000, help='Number of queries to time.')
+        parser.add_argument('--limit', type=int, default=10, help='Hotels returned per query.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--compare-scan', action='store_true',
+            help='Also time a linear scan over the catalog for the same queries.'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        catalog = synthetic_catalog(options['hotels'], options['cities'], rng)
+        queries = [
+            (
+                f"City {rng.randrange(options['cities'])}",
+                rng.randint(80, 400),
+                rng.sample(AMENITIES, rng.randint(0, 2)),
+                rng.choice([SORT_RATING, SORT_PRICE]),
+            )
+            for _ in range(options['queries'])
+        ]
+
+        started = time.perf_counter()
+        index = HotelIndex(catalog, generate_missing=False)
+        build_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(f"Indexed {len(index)} hotels in {build_ms:.1f} ms")
+
+        timings = []
+        for city, max_price, amenities, sort in queries:
+            started = time.perf_counter()
+            index.search(city, max_price=max_price, amenities=amenity_mask(amenities), sort=sort,
+                         limit=options['limit'])
+            timings.append((time.perf_counter() - started) * 1000)
+        self._report('index', timings)
+
+        if options['compare_scan']:
+            scan_queries = queries[:max(len(queries) // 20, 1)]
+            timings = []
+            for city, max_price, amenities, sort in scan_queries:
+                started = time.perf_counter()
+                linear_search(catalog, city, max_price, amenities, sort, options['limit'])
+                timings.append((time.perf_counter() - started) * 1000)
+            self._report('linear scan', timings)
+
+    def _report(self, label, timings):
+        timings.sort()
+        p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+        self.stdout.write(
+            f"{label}: {len(timings)} queries, mean {statistics.mean(timings):.3f} ms, "
+            f"p50 {statistics.median(timings):.3f} ms, p95 {p95:.3f} ms"
+        )
@@ -0,0 +1,99 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from trips.places import INTEREST_ALIASES, PlacesIndex, tokenize
+
+TYPES = ['Cultural', 'Nature', 'Food', 'Adventure', 'Nightlife', 'Shopping']
+TAGS = [
+    'art', 'museum', 'history', 'architecture', 'park', 'garden', 'hiking', 'beach',
+    'food', 'market', 'cuisine', 'wine', 'sport', 'outdoor', 'music', 'bar', 'shopping',
+    'walking', 'temple', 'castle', 'zoo', 'lake', 'mountain', 'festival',
+]
+
+
+def synthetic_catalog(size, cities, rng):
+    return [
+        {
+            'name': f"Place {n}",
+            'description': '',
+            'rating': round(rng.uniform(3.0, 5.0), 1),
+            'image': '',
+            'type': rng.choice(TYPES),
+            'tags': rng.sample(TAGS, 3),
+            'city': f"City {rng.randrange(cities)}",
+        }
+        for n in range(size)
+    ]
+
+
+def linear_search(catalog, city, interests, limit):
+    """Reference implementation: score every place in the catalog."""
+    query = tokenize(interests)
+    query |= {INTEREST_ALIASES[token] for token in query if token in INTEREST_ALIASES}
+    scored = []
+    for place in catalog:
+        if place['city'].lower() != city.lower():
+            continue
+        tokens = tokenize(place['type']) | tokenize(place['name'])
+        for tag in place['tags']:
+            tokens |= tokenize(tag)
+        score = len(tokens & query)
+        if score:
+            scored.append((score, place['rating'], place['name']))
+    scored.sort(reverse=True)
+    return scored[:limit]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark places-of-interest queries against a large synthetic catalog.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--places', type=int, default=200000, help='Catalog size.')
+        parser.add_argument('--cities', type=int, default=500, help='Number of distinct cities.')
+        parser.add_argument('--queries', type=int, default=2000, help='Number of queries to time.')
+        parser.add_argument('--limit', type=int, default=10, help='Places returned per query.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--compare-scan', action='store_true',
+            help='Also time a linear scan over the catalog for the same queries.'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        catalog = synthetic_catalog(options['places'], options['cities'], rng)
+        queries = [
+            (f"City {rng.randrange(options['cities'])}", ', '.join(rng.sample(TAGS, 2)))
+            for _ in range(options['queries'])
+        ]
+
+        started = time.perf_counter()
+        index = PlacesIndex(catalog)
+        build_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(f"Indexed {len(index)} places in {build_ms:.1f} ms")
+
+        timings = []
+        for city, interests in queries:
+            started = time.perf_counter()
+            index.search(city, interests, options['limit'])
+            timings.append((time.perf_counter() - started) * 1000)
+        self._report('index', timings)
+
+        if options['compare_scan']:
+            scan_queries = queries[:max(len(queries) // 20, 1)]
+            timings = []
+            for city, interests in scan_queries:
+                started = time.perf_counter()
+                linear_search(catalog, city, interests, options['limit'])
+                timings.append((time.perf_counter() - started) * 1000)
+            self._report('linear scan', timings)
+
+    def _report(self, label, timings):
+        timings.sort()
+        p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+        self.stdout.write(
+            f"{label}: {len(timings)} queries, mean {statistics.mean(timings):.3f} ms, "
+            f"p50 {statistics.median(timings):.3f} ms, p95 {p95:.3f} ms"
+        )
@@ -0,0 +1,237 @@
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, close_old_connections, connections, transaction
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from trips.db import pragma_values
+from trips.management.commands.bench_api import percentile
+from trips.models import Trip, TripDetail
+
+DESTINATIONS = ['Paris', 'Rome', 'Tokyo', 'New York', 'Lisbon', 'Bangkok', 'Cape Town', 'Oslo']
+REPORTED_PRAGMAS = ['journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size', 'temp_store']
+
+
+def sample_details(rng, city):
+    """JSON sections of a representative size for one trip."""
+    return {
+        'weather_data': [
+            {'date': f'2027-01-{day:02d}', 'temperature': rng.randint(-5, 35), 'conditions': 'Partly cloudy'}
+            for day in range(1, 8)
+        ],
+        'hotel_data': [
+            {'name': f'{city} Hotel {n}', 'rating': 4.2, 'price_per_night': rng.randint(60, 400),
+             'currency': 'USD', 'amenities': ['wifi', 'breakfast', 'pool']}
+            for n in range(10)
+        ],
+        'food_data': [
+            {'name': f'{city} Place {n}', 'category': 'museum', 'rating': 4.5, 'address': f'{n} Main Street'}
+            for n in range(10)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark concurrent trip reads and writes on throwaway SQLite databases, once per '
+        'profile in settings.SQLITE_PROFILES, and compare their throughput and lock errors.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles', default=','.join(settings.SQLITE_PROFILES),
+            help=f"Comma-separated subset of: {', '.join(settings.SQLITE_PROFILES)}."
+        )
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent clients.')
+        parser.add_argument('--duration', type=float, default=5, help='Seconds measured per profile.')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Fraction of operations that write.')
+        parser.add_argument('--trips', type=int, default=2000, help='Trips seeded before measuring.')
+        parser.add_argument(
+            '--dir', help='Directory for the benchmark databases (default: the system temp directory). '
+                          'Use one on the same disk as the real database for representative fsync costs.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError('bench_sqlite needs the default database to use SQLite')
+        profiles = [name.strip() for name in options['profiles'].split(',') if name.strip()]
+        unknown = set(profiles) - set(settings.SQLITE_PROFILES)
+        if unknown:
+            raise CommandError(f"Unknown profile(s): {', '.join(sorted(unknown))}")
+        if options['threads'] < 1 or options['duration'] <= 0 or not 0 <= options['write_ratio'] <= 1:
+            raise CommandError('--threads and --duration must be positive and --write-ratio within [0, 1]')
+
+        workdir = tempfile.mkdtemp(prefix='bench-sqlite-', dir=options['dir'])
+        try:
+            results = {name: self._bench(name, Path(workdir), options) for name in profiles}
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        self._print(results)
+        if len(results) > 1:
+            self._compare(results)
+
+    def _bench(self, name, workdir, options):
+        profile = settings.SQLITE_PROFILES[name]
+        alias = f'bench_{name}'
+        connections.settings[alias] = {
+            **connections[DEFAULT_DB_ALIAS].settings_dict,
+            'NAME': str(workdir / f'{name}.sqlite3'),
+            'CONN_MAX_AGE': profile['CONN_MAX_AGE'],
+        }
+        try:
+            with override_settings(SQLITE=profile):
+                self._seed(alias, options['trips'], random.Random(options['seed']))
+                pragmas = pragma_values(connections[alias], REPORTED_PRAGMAS)
+                connections[alias].close()
+                self.stdout.write(f"{name}: seeded {options['trips']} trips; {pragmas}")
+                result = self._run(alias, options)
+        finally:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        result['pragmas'] = pragmas
+        return result
+
+    def _seed(self, alias, count, rng):
+        with connections[alias].schema_editor() as editor:
+            editor.create_model(Trip)
+            editor.create_model(TripDetail)
+        trips = []
+        for _ in range(count):
+            start = date.today() + timedelta(days=rng.randint(1, 90))
+            trips.append(Trip(
+                destination=rng.choice(DESTINATIONS),
+                start_date=start,
+                end_date=start + timedelta(days=rng.randint(2, 10)),
+                budget=Decimal(rng.randint(300, 5000)),
+                interests='art, food',
+            ))
+        trips = Trip.objects.using(alias).bulk_create(trips, batch_size=500)
+        TripDetail.objects.using(alias).bulk_create([
+            TripDetail(trip=trip, status=TripDetail.STATUS_READY, **sample_details(rng, trip.destination))
+            for trip in trips
+        ], batch_size=500)
+        self.trip_count = count
+
+    def _read(self, alias, rng):
+        trip = Trip.objects.using(alias).select_related('details').get(pk=rng.randint(1, self.trip_count))
+        return trip.details.hotel_data
+
+    def _write(self, alias, rng):
+        if rng.random() < 0.5:
+            Trip.objects.using(alias).filter(pk=rng.randint(1, self.trip_count)).update(
+                budget=Decimal(rng.randint(300, 5000)), updated_at=timezone.now()
+            )
+            return
+        with transaction.atomic(using=alias):
+            trip = Trip.objects.using(alias).create(
+                destination=rng.choice(DESTINATIONS),
+                start_date=date.today(),
+                end_date=date.today() + timedelta(days=3),
+                budget=Decimal(rng.randint(300, 5000)),
+                interests='food',
+            )
+            TripDetail.objects.using(alias).create(trip=trip, **sample_details(rng, trip.destination))
+
+    def _run(self, alias, options):
+        """Run the mixed workload on --threads threads; each operation is handled like a request."""
+        barrier = threading.Barrier(options['threads'] + 1)
+        lock = threading.Lock()
+        timings = {'read': [], 'write': []}
+        totals = {'errors': 0, 'connections': 0}
+
+        def count_connection(sender, connection, **kwargs):
+            if connection.alias == alias:
+                with lock:
+                    totals['connections'] += 1
+
+        def client(index):
+            rng = random.Random(options['seed'] * 1000 + index)
+            own = {'read': [], 'write': []}
+            errors = 0
+            barrier.wait()
+            deadline = time.monotonic() + options['duration']
+            try:
+                while time.monotonic() < deadline:
+                    kind = 'write' if rng.random() < options['write_ratio'] else 'read'
+                    # Like request_started/request_finished: connections older than CONN_MAX_AGE are closed
+                    close_old_connections()
+                    started = time.perf_counter()
+                    try:
+                        if kind == 'write':
+                            self._write(alias, rng)
+                        else:
+                            self._read(alias, rng)
+                        own[kind].append((time.perf_counter() - started) * 1000)
+                    except OperationalError:
+                        # "database is locked" once the busy timeout ran out
+                        errors += 1
+                    finally:
+                        close_old_connections()
+            finally:
+                connections[alias].close()
+                with lock:
+                    for name, values in own.items():
+                        timings[name].extend(values)
+                    totals['errors'] += errors
+
+        connection_created.connect(count_connection)
+        try:
+            threads = [threading.Thread(target=client, args=(n,)) for n in range(options['threads'])]
+            for thread in threads:
+                thread.start()
+            barrier.wait()
+            started = time.perf_counter()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            connection_created.disconnect(count_connection)
+
+        result = {
+            'reads': len(timings['read']),
+            'writes': len(timings['write']),
+            'errors': totals['errors'],
+            'connections': totals['connections'],
+            'ops_per_sec': round((len(timings['read']) + len(timings['write'])) / elapsed, 1),
+        }
+        for name, values in timings.items():
+            values.sort()
+            result[f'{name}_mean_ms'] = round(statistics.mean(values), 3) if values else None
+            result[f'{name}_p99_ms'] = round(percentile(values, 99), 3) if values else None
+        return result
+
+    def _print(self, results):
+        self.stdout.write(
+            f"{'profile':<12}{'ops/s':>10}{'reads':>9}{'writes':>9}{'errors':>8}{'conns':>8}"
+            f"{'read p99':>10}{'write p99':>11}"
+        )
+        for name, result in results.items():
+            read_p99 = result['read_p99_ms'] if result['read_p99_ms'] is not None else float('nan')
+            write_p99 = result['write_p99_ms'] if result['write_p99_ms'] is not None else float('nan')
+            self.stdout.write(
+                f"{name:<12}{result['ops_per_sec']:>10.1f}{result['reads']:>9}{result['writes']:>9}"
+                f"{result['errors']:>8}{result['connections']:>8}{read_p99:>10.2f}{write_p99:>11.2f}"
+            )
+
+    def _compare(self, results):
+        (base_name, base), *others = results.items()
+        for name, result in others:
+            if base['ops_per_sec']:
+                self.stdout.write(
+                    f"{name} vs {base_name}: {result['ops_per_sec'] / base['ops_per_sec']:.2f}x throughput, "
+                    f"{result['errors']} vs {base['errors']} lock errors"
+                )
@@ -0,0 +1,31 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from trips.bulk import export_trips
+
+
+class Command(BaseCommand):
+    help = 'Export all trips with their details as NDJSON (one trip per line).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help='File to write; defaults to stdout.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.TRIP_BULK['CHUNK_SIZE'],
+            help='Trips read per query.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['output']:
+            for line in export_trips(chunk_size=options['chunk_size']):
+                sys.stdout.buffer.write(line)
+            sys.stdout.flush()
+            return
+
+        count = 0
+        with open(options['output'], 'wb') as f:
+            for line in export_trips(chunk_size=options['chunk_size']):
+                f.write(line)
+                count += 1
+        self.stdout.write(f"Exported {count} trip(s) to {options['output']}")
@@ -0,0 +1,31 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from trips.bulk import import_trips
+
+
+class Command(BaseCommand):
+    help = 'Import trips from an NDJSON file (one trip per line); enrichment is queued for the worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON file to read, or '-' for stdin.")
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.TRIP_BULK['CHUNK_SIZE'],
+            help='Rows validated and written per transaction.'
+        )
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            result = import_trips(sys.stdin, options['chunk_size'])
+        else:
+            try:
+                with open(options['path'], encoding='utf-8') as f:
+                    result = import_trips(f, options['chunk_size'])
+            except OSError as e:
+                raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(f"Imported {result.imported} trip(s), {result.failed} line(s) failed")
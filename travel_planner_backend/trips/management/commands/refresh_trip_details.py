@@ -0,0 +1,154 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from trips.concurrency import RateLimiter
+from trips.models import Trip, TripDetail
+from trips.services import TripEnrichmentService, WeatherService
+
+
+class Command(BaseCommand):
+    help = (
+        'Fetch missing or stale trip details ahead of time. Trips are walked in id order, '
+        'in chunks, and enriched on a thread pool; progress can be checkpointed and resumed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Trips enriched concurrently.')
+        parser.add_argument(
+            '--rate', type=float, default=0,
+            help='Maximum trips started per second (0 for no limit).'
+        )
+        parser.add_argument('--chunk-size', type=int, default=200, help='Trips loaded per query.')
+        parser.add_argument('--destination', help='Only trips to this destination (case-insensitive).')
+        parser.add_argument(
+            '--departing-within', type=int, metavar='DAYS',
+            help='Only trips starting between today and DAYS days from now.'
+        )
+        parser.add_argument('--start-after', type=date.fromisoformat, help='Only trips starting on or after this date.')
+        parser.add_argument('--start-before', type=date.fromisoformat, help='Only trips starting on or before this date.')
+        parser.add_argument(
+            '--all-sections', action='store_true',
+            help='Refetch every section, not only missing or stale ones.'
+        )
+        parser.add_argument('--checkpoint', help='File recording the last finished trip id.')
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Continue after the trip id recorded in --checkpoint.'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be refreshed.')
+
+    def handle(self, *args, **options):
+        if options['resume'] and not options['checkpoint']:
+            raise CommandError('--resume requires --checkpoint')
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers and --chunk-size must be positive')
+
+        queryset = self._filter(Trip.objects.select_related('details'), options).order_by('id')
+        last_id = self._read_checkpoint(options['checkpoint']) if options['resume'] else 0
+        limiter = RateLimiter(options['rate'], max(options['rate'], 1)) if options['rate'] > 0 else None
+        totals = {'refreshed': 0, 'skipped': 0, 'failed': 0}
+
+        with ThreadPoolExecutor(max_workers=options['workers'], thread_name_prefix='trip-refresh') as pool:
+            while True:
+                trips = list(queryset.filter(id__gt=last_id)[:options['chunk_size']])
+                if not trips:
+                    break
+                self._refresh_chunk(trips, pool, limiter, options, totals)
+                last_id = trips[-1].id
+                if options['checkpoint'] and not options['dry_run']:
+                    self._write_checkpoint(options['checkpoint'], last_id, totals)
+                self.stdout.write(
+                    f"Up to trip {last_id}: {totals['refreshed']} refreshed, "
+                    f"{totals['skipped']} up to date, {totals['failed']} failed"
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {totals['refreshed']} refreshed, {totals['skipped']} up to date, {totals['failed']} failed"
+        ))
+
+    def _filter(self, queryset, options):
+        if options['destination']:
+            queryset = queryset.filter(destination__iexact=options['destination'])
+        if options['departing_within'] is not None:
+            today = timezone.localdate()
+            queryset = queryset.filter(
+                start_date__gte=today, start_date__lte=today + timedelta(days=options['departing_within'])
+            )
+        if options['start_after']:
+            queryset = queryset.filter(start_date__gte=options['start_after'])
+        if options['start_before']:
+            queryset = queryset.filter(start_date__lte=options['start_before'])
+        return queryset
+
+    def _refresh_chunk(self, trips, pool, limiter, options, totals):
+        now = timezone.now()
+        work = []
+        for trip in trips:
+            trip_detail = getattr(trip, 'details', None)
+            if options['all_sections'] or trip_detail is None:
+                providers = list(TripEnrichmentService.FIELDS)
+            else:
+                providers = TripEnrichmentService.stale_providers(trip_detail, now)
+            if providers:
+                work.append((trip, providers))
+            else:
+                totals['skipped'] += 1
+
+        if options['dry_run']:
+            totals['refreshed'] += len(work)
+            return
+
+        # Weather for the whole chunk is generated in one vectorized pass
+        weather_trips = [trip for trip, providers in work if 'weather' in providers]
+        forecasts = WeatherService.get_forecasts(
+            [(trip.destination, trip.start_date, trip.end_date) for trip in weather_trips]
+        )
+        weather_by_trip = {trip.id: forecasts.forecast(i) for i, trip in enumerate(weather_trips)}
+
+        def enrich(trip, providers):
+            if limiter is not None:
+                limiter.acquire()
+            others = [name for name in providers if name != 'weather']
+            results = TripEnrichmentService.enrich(trip, others) if others else {}
+            if trip.id in weather_by_trip:
+                results['weather'] = weather_by_trip[trip.id]
+            return results
+
+        # Provider calls run on the pool; the results are saved from this thread
+        futures = [(trip, pool.submit(enrich, trip, providers)) for trip, providers in work]
+        for trip, future in futures:
+            try:
+                results = future.result()
+                with transaction.atomic():
+                    trip_detail, _ = TripDetail.objects.get_or_create(trip=trip)
+                    updated_fields = TripEnrichmentService.apply(trip_detail, results)
+                    if not updated_fields:
+                        raise RuntimeError('Every enrichment provider failed')
+                    trip_detail.status = TripDetail.STATUS_READY
+                    trip_detail.save(update_fields=updated_fields + ['status'])
+                totals['refreshed'] += 1
+            except Exception as e:
+                self.stderr.write(f"Trip {trip.id}: {str(e)}")
+                totals['failed'] += 1
+
+    def _read_checkpoint(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return int(json.load(f)['last_id'])
+        except FileNotFoundError:
+            return 0
+        except (ValueError, KeyError, TypeError) as e:
+            raise CommandError(f"Unreadable checkpoint {path}: {str(e)}")
+
+    def _write_checkpoint(self, path, last_id, totals):
+        # Write then rename so an interrupted run never leaves a truncated checkpoint
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'last_id': last_id, **totals}, f)
+        os.replace(tmp_path, path)
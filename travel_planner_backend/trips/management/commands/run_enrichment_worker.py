@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from trips.jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Process queued trip enrichment jobs (weather, hotels, places).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Drain the queue once and exit instead of polling forever.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.ENRICHMENT_JOBS['POLL_INTERVAL'],
+            help='Seconds to sleep when the queue is empty.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = run_pending_jobs()
+            if processed:
+                self.stdout.write(f"Processed {processed} enrichment job(s)")
+            if options['once']:
+                break
+            close_old_connections()
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,219 @@
+"""
+In-process request and provider metrics.
+
+MetricsMiddleware (trips/middleware.py) opens a RequestMetrics for each
+request in a context variable. Database queries, serializer time and
+provider calls made while handling the request add to it, and the totals are
+sent back in the Server-Timing header. Every measurement is also recorded in
+histograms that /metrics renders in the Prometheus text format.
+
+Metrics live in the process: with several worker processes, each exposes
+its own. Work submitted through concurrency.submit() keeps adding to the
+request it was started from.
+"""
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Histogram:
+    """Thread-safe Prometheus-style histogram with a fixed set of label names."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}   # label values -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", bound)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {cumulative}')
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+REQUEST_DURATION = Histogram(
+    'trips_http_request_duration_seconds', 'Time to produce a response, by view.',
+    ['method', 'view', 'status']
+)
+REQUEST_DB_DURATION = Histogram(
+    'trips_http_request_db_duration_seconds', 'Database time spent per request.', ['view']
+)
+REQUEST_DB_QUERIES = Histogram(
+    'trips_http_request_db_queries', 'Database queries run per request.', ['view'], COUNT_BUCKETS
+)
+SERIALIZER_DURATION = Histogram(
+    'trips_serializer_duration_seconds', 'Time spent building serializer output.', ['serializer']
+)
+PROVIDER_DURATION = Histogram(
+    'trips_provider_call_duration_seconds', 'Latency of provider calls, by outcome (ok, empty, error).',
+    ['provider', 'outcome']
+)
+
+REGISTRY = [REQUEST_DURATION, REQUEST_DB_DURATION, REQUEST_DB_QUERIES, SERIALIZER_DURATION, PROVIDER_DURATION]
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    return '\n'.join(histogram.render() for histogram in REGISTRY) + '\n'
+
+
+class RequestMetrics:
+    """Time spent on DB queries, serialization and each provider during one request."""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.timings = {}   # name -> seconds, in first-seen order
+        self._lock = threading.Lock()
+
+    def add_query(self, seconds):
+        with self._lock:
+            self.db_queries += 1
+            self.db_time += seconds
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def server_timing(self, total):
+        """Server-Timing header value; durations are in milliseconds."""
+        with self._lock:
+            entries = [f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"']
+            entries += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.timings.items()]
+        entries.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(entries)
+
+
+_current = contextvars.ContextVar('trips_request_metrics', default=None)
+
+
+def start_request():
+    """Begin collecting for a request; returns (RequestMetrics, token for end_request)."""
+    request_metrics = RequestMetrics()
+    return request_metrics, _current.set(request_metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current():
+    """The RequestMetrics of the request being handled, or None outside a request."""
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper (installed on every connection by TripsConfig) adding each query's time to the current request."""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        request_metrics = _current.get()
+        if request_metrics is not None:
+            request_metrics.add_query(time.perf_counter() - started)
+
+
+def record_serializer(name, seconds):
+    SERIALIZER_DURATION.observe(seconds, serializer=name)
+    request_metrics = _current.get()
+    if request_metrics is not None:
+        request_metrics.add('serialize', seconds)
+
+
+def observe_request(request, response, seconds, request_metrics):
+    match = getattr(request, 'resolver_match', None)
+    view = (match.view_name if match else None) or 'unmatched'
+    REQUEST_DURATION.observe(seconds, method=request.method, view=view, status=response.status_code)
+    REQUEST_DB_DURATION.observe(request_metrics.db_time, view=view)
+    REQUEST_DB_QUERIES.observe(request_metrics.db_queries, view=view)
+    if settings.METRICS['SERVER_TIMING']:
+        response['Server-Timing'] = request_metrics.server_timing(seconds)
+
+
+def instrument_provider(provider):
+    """Decorator recording the latency and outcome of a provider call.
+
+    The outcome is 'error' if the call raised, 'empty' if it returned
+    nothing (None or []), and 'ok' otherwise. Decorate the call that raises
+    on failure, not a wrapper that turns failures into empty results, or
+    errors are counted as 'empty'. Coroutine functions are timed until they
+    complete.
+    """
+    def record(started, outcome):
+        elapsed = time.perf_counter() - started
+        PROVIDER_DURATION.observe(elapsed, provider=provider, outcome=outcome)
+        request_metrics = _current.get()
+        if request_metrics is not None:
+            request_metrics.add(provider, elapsed)
+
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                outcome = 'error'
+                try:
+                    result = await fn(*args, **kwargs)
+                    outcome = 'ok' if result else 'empty'
+                    return result
+                finally:
+                    record(started, outcome)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = fn(*args, **kwargs)
+                outcome = 'ok' if result else 'empty'
+                return result
+            finally:
+                record(started, outcome)
+        return wrapper
+    return decorator
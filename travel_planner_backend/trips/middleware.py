@@ -0,0 +1,71 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import metrics, tracing
+
+
+class MetricsMiddleware:
+    """Time each request, its DB queries, serializers and provider calls (see trips/metrics.py).
+
+    Put it first in MIDDLEWARE so the total covers the other middleware too.
+    Streaming responses are measured up to the point their body starts.
+    Queries are counted by metrics.record_query, which TripsConfig installs
+    on every database connection.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_metrics, token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        metrics.observe_request(request, response, time.perf_counter() - started, request_metrics)
+        return response
+
+    async def __acall__(self, request):
+        request_metrics, token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        metrics.observe_request(request, response, time.perf_counter() - started, request_metrics)
+        return response
+
+
+class TracingMiddleware:
+    """Pick the requests that emit detailed traces (see trips/tracing.py)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = tracing.start_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            tracing.end_request(token)
+
+    async def __acall__(self, request):
+        token = tracing.start_request(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            tracing.end_request(token)
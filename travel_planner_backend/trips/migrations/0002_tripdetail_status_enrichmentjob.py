@@ -0,0 +1,58 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_detail_status(apps, schema_editor):
+    """Mark enriched details ready and queue enrichment for the empty ones."""
+    TripDetail = apps.get_model('trips', 'TripDetail')
+    EnrichmentJob = apps.get_model('trips', 'EnrichmentJob')
+    Trip = apps.get_model('trips', 'Trip')
+
+    enriched = (
+        models.Q(weather_data__isnull=False) & ~models.Q(weather_data='')
+        | models.Q(hotel_data__isnull=False) & ~models.Q(hotel_data='')
+        | models.Q(food_data__isnull=False) & ~models.Q(food_data='')
+    )
+    TripDetail.objects.filter(enriched).update(status='ready')
+
+    pending_trip_ids = list(TripDetail.objects.exclude(enriched).values_list('trip_id', flat=True))
+    missing_trip_ids = list(Trip.objects.filter(details__isnull=True).values_list('id', flat=True))
+    TripDetail.objects.bulk_create([TripDetail(trip_id=trip_id) for trip_id in missing_trip_ids])
+    EnrichmentJob.objects.bulk_create([
+        EnrichmentJob(trip_id=trip_id) for trip_id in pending_trip_ids + missing_trip_ids
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tripdetail',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='EnrichmentJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrichment_jobs', to='trips.trip')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='trips_job_status_run_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_detail_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0002_tripdetail_status_enrichmentjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['-created_at', '-id'], name='trips_trip_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.16 on 2026-10-18 04:33
+
+import ast
+import json
+
+from django.db import migrations, models
+
+
+def _to_json_text(text):
+    """Return valid JSON text for a stored value, or None if it can't be recovered."""
+    if not text:
+        return None
+    try:
+        json.loads(text)
+        return text
+    except ValueError:
+        pass
+    # Rows enriched by the old retrieve() stored str() of a Python list
+    try:
+        return json.dumps(ast.literal_eval(text))
+    except (ValueError, SyntaxError, TypeError):
+        return None
+
+
+def normalize_detail_json(apps, schema_editor):
+    """Make every stored blob valid JSON so the columns can become JSON columns."""
+    TripDetail = apps.get_model('trips', 'TripDetail')
+    fields = ['weather_data', 'hotel_data', 'food_data']
+    changed = []
+    for detail in TripDetail.objects.only('id', *fields).iterator(chunk_size=500):
+        dirty = False
+        for field in fields:
+            value = getattr(detail, field)
+            normalized = _to_json_text(value)
+            if normalized != value:
+                setattr(detail, field, normalized)
+                dirty = True
+        if dirty:
+            changed.append(detail)
+    TripDetail.objects.bulk_update(changed, fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0003_trip_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_detail_json, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='tripdetail',
+            name='food_data',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='tripdetail',
+            name='hotel_data',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='tripdetail',
+            name='weather_data',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0004_tripdetail_json_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tripdetail',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.16 on 2026-10-18 04:42
+
+from django.db import migrations, models
+
+
+def backfill_fetched_at(apps, schema_editor):
+    """Date existing sections by their trip's last update so they age out normally."""
+    TripDetail = apps.get_model('trips', 'TripDetail')
+    Trip = apps.get_model('trips', 'Trip')
+
+    trip_updated_at = models.Subquery(
+        Trip.objects.filter(pk=models.OuterRef('trip_id')).values('updated_at')[:1]
+    )
+    for data_field, fetched_at_field in [
+        ('weather_data', 'weather_fetched_at'),
+        ('hotel_data', 'hotel_fetched_at'),
+        ('food_data', 'food_fetched_at'),
+    ]:
+        TripDetail.objects.filter(**{f'{data_field}__isnull': False}).update(
+            **{fetched_at_field: trip_updated_at}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0005_tripdetail_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrichmentjob',
+            name='providers',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='tripdetail',
+            name='food_fetched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tripdetail',
+            name='hotel_fetched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tripdetail',
+            name='weather_fetched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_fetched_at, migrations.RunPython.noop),
+    ]
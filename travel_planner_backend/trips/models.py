@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.functions import Cast
+from django.utils import timezone
 
 # Create your models here.
 
@@ -11,14 +13,120 @@ class Trip(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Backs keyset pagination of the trips list (see trips/pagination.py)
+            models.Index(fields=['-created_at', '-id'], name='trips_trip_created_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.destination} ({self.start_date} - {self.end_date})"
 
+class TripDetailQuerySet(models.QuerySet):
+    def with_raw_json(self):
+        """Load the JSON columns as undecoded text in `<field>_raw` attributes.
+
+        The decoded fields are deferred, so TripDetailSerializer can splice the
+        stored JSON into the response without a decode/re-encode round trip.
+        """
+        return self.defer(*TripDetail.JSON_FIELDS).annotate(**{
+            f'{field}_raw': Cast(field, output_field=models.TextField())
+            for field in TripDetail.JSON_FIELDS
+        })
+
 class TripDetail(models.Model):
+    JSON_FIELDS = ('weather_data', 'hotel_data', 'food_data')
+    FETCHED_AT_FIELDS = ('weather_fetched_at', 'hotel_fetched_at', 'food_fetched_at')
+
+    STATUS_PENDING = 'pending'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_READY, 'Ready'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
     trip = models.OneToOneField(Trip, on_delete=models.CASCADE, related_name='details')
-    weather_data = models.TextField(null=True, blank=True)  # Store JSON as text
-    hotel_data = models.TextField(null=True, blank=True)    # Store JSON as text
-    food_data = models.TextField(null=True, blank=True)     # Store JSON as text
+    weather_data = models.JSONField(null=True, blank=True)
+    hotel_data = models.JSONField(null=True, blank=True)
+    food_data = models.JSONField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # When each section was last fetched; compared with TRIP_ENRICHMENT['SECTION_TTLS']
+    weather_fetched_at = models.DateTimeField(null=True, blank=True)
+    hotel_fetched_at = models.DateTimeField(null=True, blank=True)
+    food_fetched_at = models.DateTimeField(null=True, blank=True)
+    # Bumped on every save; part of the cache key of rendered trip responses
+    version = models.PositiveIntegerField(default=0)
+
+    objects = TripDetailQuerySet.as_manager()
     
     def __str__(self):
         return f"Details for {self.trip.destination}"
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.version += 1
+            super().save(*args, **kwargs)
+            return
+        # Bump in the UPDATE itself: two saves from the same loaded version
+        # (an inline refresh and the worker) must not share a version number
+        self.version = models.F('version') + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'version'}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
+
+    def raw_json(self, field):
+        """Undecoded JSON text of `field` if it was loaded with with_raw_json() and not set since."""
+        if field in self.get_deferred_fields():
+            return getattr(self, f'{field}_raw', None)
+        return None
+
+    def has_fetched(self):
+        """True if any section has been fetched, even if its provider found nothing."""
+        return any(getattr(self, field) for field in self.FETCHED_AT_FIELDS) or self.has_data()
+
+    def has_data(self):
+        """True if any section has been fetched, without decoding the JSON columns."""
+        deferred = self.get_deferred_fields()
+        return any(
+            self.raw_json(field) if field in deferred else getattr(self, field)
+            for field in self.JSON_FIELDS
+        )
+
+class EnrichmentJob(models.Model):
+    """A queued request to fetch weather, hotels and places for a trip.
+
+    Jobs are picked up by the local worker (see trips/jobs.py and the
+    run_enrichment_worker management command); no external broker is needed.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='enrichment_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    # Providers to refresh (see TripEnrichmentService.FIELDS); empty means all
+    providers = models.JSONField(default=list, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='trips_job_status_run_idx'),
+        ]
+
+    def __str__(self):
+        return f"Enrichment job {self.id} for trip {self.trip_id} ({self.status})"
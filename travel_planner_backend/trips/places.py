@@ -0,0 +1,183 @@
+"""
+Places-of-interest catalog with an inverted index for interest queries.
+
+The catalog is loaded once per process (settings.PLACES['CATALOG_PATH'], or
+the built-in default catalog) and indexed by destination and by the tokens
+of each place's type, tags and name. A query only touches the postings of
+the trip's interest tokens, so its cost grows with the number of matching
+places rather than with the catalog size.
+"""
+import heapq
+import json
+import re
+import threading
+
+from django.conf import settings
+
+# Places without a city are generic and offered for every destination
+DEFAULT_CATALOG = [
+    {
+        'name': 'Historic City Center',
+        'description': 'Beautiful historic district with architecture from the 18th century',
+        'rating': 4.5,
+        'image': 'https://picsum.photos/400/300',
+        'type': 'Cultural',
+        'tags': ['history', 'architecture', 'walking', 'sightseeing'],
+    },
+    {
+        'name': 'Central Park Gardens',
+        'description': 'Expansive park with walking trails and botanical gardens',
+        'rating': 4.7,
+        'image': 'https://picsum.photos/400/301',
+        'type': 'Nature',
+        'tags': ['park', 'garden', 'walking', 'hiking', 'relaxation'],
+    },
+    {
+        'name': 'Museum of Modern Art',
+        'description': 'World-class museum featuring contemporary artworks',
+        'rating': 4.6,
+        'image': 'https://picsum.photos/400/302',
+        'type': 'Cultural',
+        'tags': ['art', 'museum', 'culture'],
+    },
+    {
+        'name': 'Local Food Market',
+        'description': 'Traditional market with local specialties and fresh produce',
+        'rating': 4.4,
+        'image': 'https://picsum.photos/400/303',
+        'type': 'Food',
+        'tags': ['food', 'market', 'cuisine', 'shopping'],
+    },
+    {
+        'name': 'Adventure Sports Center',
+        'description': 'Various outdoor activities and adventure sports',
+        'rating': 4.3,
+        'image': 'https://picsum.photos/400/304',
+        'type': 'Adventure',
+        'tags': ['adventure', 'sport', 'outdoor'],
+    },
+]
+
+# Fields of a catalog entry that are returned to clients
+PUBLIC_FIELDS = ('name', 'description', 'rating', 'image', 'type')
+
+STOPWORDS = frozenset(['a', 'an', 'and', 'at', 'for', 'in', 'of', 'on', 'the', 'to', 'with'])
+
+# Interest words that should also match a place type
+INTEREST_ALIASES = {
+    'art': 'cultural',
+    'culture': 'cultural',
+    'history': 'cultural',
+    'museum': 'cultural',
+    'hiking': 'nature',
+    'park': 'nature',
+    'outdoor': 'adventure',
+    'sport': 'adventure',
+    'cuisine': 'food',
+    'restaurant': 'food',
+}
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lowercase word tokens of `text` with stopwords dropped and plurals folded."""
+    tokens = set()
+    for token in _TOKEN_RE.findall((text or '').lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.add(token)
+    return tokens
+
+
+def normalize_city(city):
+    return ' '.join((city or '').lower().split())
+
+
+class PlacesIndex:
+    """Inverted index over a places catalog.
+
+    For every city (and '' for generic places) it keeps token -> place ids
+    and the place ids sorted by rating, used when no interest matches.
+    """
+
+    def __init__(self, places):
+        self.places = [dict(place) for place in places]
+        self._postings = {}     # city -> token -> [place id]
+        self._by_rating = {}    # city -> [place id], best rated first
+
+        for place_id, place in enumerate(self.places):
+            city = normalize_city(place.get('city'))
+            tokens = tokenize(place.get('type')) | tokenize(place.get('name'))
+            for tag in place.get('tags', ()):
+                tokens |= tokenize(tag)
+            postings = self._postings.setdefault(city, {})
+            for token in tokens:
+                postings.setdefault(token, []).append(place_id)
+            self._by_rating.setdefault(city, []).append(place_id)
+
+        for place_ids in self._by_rating.values():
+            place_ids.sort(key=lambda place_id: -self.places[place_id].get('rating', 0))
+
+    def __len__(self):
+        return len(self.places)
+
+    def search(self, city, interests, limit):
+        """Return up to `limit` places for `city` ranked by how well they match `interests`.
+
+        Score is the number of distinct interest tokens a place matches;
+        places specific to the city beat generic ones, then higher ratings
+        win. Without any match the best rated places are returned.
+        """
+        query = tokenize(interests)
+        query |= {INTEREST_ALIASES[token] for token in query if token in INTEREST_ALIASES}
+        cities = [normalize_city(city), '']
+
+        scores = {}
+        for rank, city_key in enumerate(cities):
+            postings = self._postings.get(city_key, {})
+            for token in query:
+                for place_id in postings.get(token, ()):
+                    score = scores.get(place_id)
+                    scores[place_id] = (score[0] + 1, score[1]) if score else (1, -rank)
+
+        if scores:
+            best = heapq.nlargest(
+                limit, scores.items(),
+                key=lambda item: (item[1], self.places[item[0]].get('rating', 0))
+            )
+            place_ids = [place_id for place_id, _ in best]
+        else:
+            place_ids = []
+            for city_key in cities:
+                place_ids.extend(self._by_rating.get(city_key, [])[:limit - len(place_ids)])
+
+        return [self.public(place_id) for place_id in place_ids]
+
+    def public(self, place_id):
+        place = self.places[place_id]
+        return {field: place[field] for field in PUBLIC_FIELDS if field in place}
+
+
+def load_catalog():
+    path = settings.PLACES['CATALOG_PATH']
+    if not path:
+        return DEFAULT_CATALOG
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Return the process-wide places index, building it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = PlacesIndex(load_catalog())
+    return _index
@@ -0,0 +1,78 @@
+import json
+import re
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class RawJSON:
+    """Already-encoded JSON text that SplicingJSONRenderer writes out verbatim."""
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+    def decode(self):
+        return json.loads(self.text)
+
+    def __repr__(self):
+        return f'RawJSON({self.text[:40]!r})'
+
+
+class SplicingJSONRenderer(JSONRenderer):
+    """JSONRenderer that splices RawJSON values into the output without re-encoding them.
+
+    RawJSON values are first rendered as unique placeholder strings, which
+    are then replaced by the stored JSON text in a single pass.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        fragments = []
+        token = uuid.uuid4().hex
+        base_encoder = self.encoder_class
+
+        class SplicingEncoder(base_encoder):
+            def default(self, obj):
+                if isinstance(obj, RawJSON):
+                    fragments.append(obj.text.encode('utf-8'))
+                    return f'{token}:{len(fragments) - 1}'
+                return super().default(obj)
+
+        # Renderer instances are created per request, so swapping the encoder is safe
+        self.encoder_class = SplicingEncoder
+        try:
+            rendered = super().render(data, accepted_media_type, renderer_context)
+        finally:
+            self.encoder_class = base_encoder
+
+        if not fragments:
+            return rendered
+        placeholder = re.compile(b'"' + token.encode('ascii') + rb':(\d+)"')
+        return placeholder.sub(lambda match: fragments[int(match.group(1))], rendered)
+
+
+class RawJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder that decodes RawJSON values, for code paths that can't splice."""
+
+    def default(self, obj):
+        if isinstance(obj, RawJSON):
+            return obj.decode()
+        return super().default(obj)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Newline-delimited JSON.
+
+    Streaming views return a StreamingHttpResponse themselves; this renderer
+    lets content negotiation accept `application/x-ndjson` (or ?format=ndjson)
+    and renders any regular Response, such as a 400 error, as a single line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data, cls=RawJSONEncoder) + '\n').encode(self.charset)
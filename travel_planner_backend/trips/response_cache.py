@@ -0,0 +1,57 @@
+"""
+Cache of fully rendered trip detail responses.
+
+Each trip has one entry holding the rendered JSON bytes and the fingerprint
+it was rendered for: the trip's updated_at and its TripDetail.version. Any
+change to the trip or its details changes the fingerprint, so a stale entry
+is never served, even from another process's cache; writers also delete the
+entry so the memory is released straight away.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Trip
+
+
+def _cache():
+    return caches[settings.TRIP_RESPONSE_CACHE['ALIAS']]
+
+
+def _key(trip_id):
+    return f'trip-response:{trip_id}'
+
+
+def fingerprint(trip_id):
+    """Return (updated_at, details version) for a trip with one indexed query, or None if it doesn't exist."""
+    return Trip.objects.filter(pk=trip_id).values_list('updated_at', 'details__version').first()
+
+
+async def afingerprint(trip_id):
+    return await Trip.objects.filter(pk=trip_id).values_list('updated_at', 'details__version').afirst()
+
+
+def get(trip_id, current_fingerprint):
+    """Rendered response bytes for the trip if cached for `current_fingerprint`, else None."""
+    entry = _cache().get(_key(trip_id))
+    if entry and entry[0] == current_fingerprint:
+        return entry[1]
+    return None
+
+
+async def aget(trip_id, current_fingerprint):
+    entry = await _cache().aget(_key(trip_id))
+    if entry and entry[0] == current_fingerprint:
+        return entry[1]
+    return None
+
+
+def store(trip_id, current_fingerprint, content):
+    _cache().set(_key(trip_id), (current_fingerprint, content), timeout=settings.TRIP_RESPONSE_CACHE['TTL'])
+
+
+async def astore(trip_id, current_fingerprint, content):
+    await _cache().aset(_key(trip_id), (current_fingerprint, content), timeout=settings.TRIP_RESPONSE_CACHE['TTL'])
+
+
+def invalidate(trip_id):
+    _cache().delete(_key(trip_id))
@@ -1,61 +1,67 @@
+import time
+from collections import OrderedDict
+
 from rest_framework import serializers
+from . import metrics
 from .models import Trip, TripDetail
-import json
+from .renderers import RawJSON
+
+class TimedSerializerMixin:
+    """Record the time spent building `.data` in the request metrics."""
+
+    @property
+    def data(self):
+        started = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            name = getattr(self, 'child', self).__class__.__name__
+            metrics.record_serializer(name, time.perf_counter() - started)
 
-class TripDetailSerializer(serializers.ModelSerializer):
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+class TripDetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = TripDetail
-        fields = ['weather_data', 'hotel_data', 'food_data']
+        list_serializer_class = TimedListSerializer
+        fields = [
+            'weather_data', 'hotel_data', 'food_data', 'status',
+            'weather_fetched_at', 'hotel_fetched_at', 'food_fetched_at',
+        ]
+        read_only_fields = ['status', 'weather_fetched_at', 'hotel_fetched_at', 'food_fetched_at']
 
     def to_representation(self, instance):
-        ret = super().to_representation(instance)
-        # Convert stored JSON strings back to Python objects
-        for field in ['weather_data', 'hotel_data', 'food_data']:
-            if ret[field]:
-                try:
-                    ret[field] = json.loads(ret[field])
-                except (json.JSONDecodeError, TypeError):
-                    ret[field] = None
-        return ret
+        # Details loaded with TripDetail.objects.with_raw_json() keep their JSON
+        # undecoded; pass it through as RawJSON for SplicingJSONRenderer
+        raw = {field: instance.raw_json(field) for field in instance.get_deferred_fields() & set(TripDetail.JSON_FIELDS)}
+        if not raw:
+            return super().to_representation(instance)
 
-    def to_internal_value(self, data):
-        # Convert incoming Python objects to JSON strings
-        internal_data = {}
-        for field in ['weather_data', 'hotel_data', 'food_data']:
-            value = data.get(field)
-            if value:
-                try:
-                    internal_data[field] = json.dumps(value)
-                except (TypeError, ValueError):
-                    internal_data[field] = None
+        ret = OrderedDict()
+        for field in self._readable_fields:
+            if field.field_name in raw:
+                text = raw[field.field_name]
+                ret[field.field_name] = RawJSON(text) if text is not None else None
             else:
-                internal_data[field] = None
-        return super().to_internal_value(internal_data)
+                attribute = field.get_attribute(instance)
+                ret[field.field_name] = field.to_representation(attribute) if attribute is not None else None
+        return ret
 
-class TripSerializer(serializers.ModelSerializer):
+class TripSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     details = TripDetailSerializer(required=False)
 
     class Meta:
         model = Trip
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'destination', 'start_date', 'end_date', 'budget', 'interests', 'details', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
     def create(self, validated_data):
         details_data = validated_data.pop('details', {})
         trip = Trip.objects.create(**validated_data)
-        
-        # Create TripDetail with safe JSON handling
-        detail_data = {}
-        for field in ['weather_data', 'hotel_data', 'food_data']:
-            value = details_data.get(field)
-            if value:
-                try:
-                    detail_data[field] = json.dumps(value)
-                except (TypeError, ValueError):
-                    detail_data[field] = None
-            else:
-                detail_data[field] = None
-        
+
+        detail_data = {field: details_data.get(field) or None for field in TripDetail.JSON_FIELDS}
         TripDetail.objects.create(trip=trip, **detail_data)
         return trip
 
@@ -69,13 +75,10 @@ class TripSerializer(serializers.ModelSerializer):
         # Update trip details if provided
         if details_data and hasattr(instance, 'details'):
             details = instance.details
-            for field in ['weather_data', 'hotel_data', 'food_data']:
+            for field in TripDetail.JSON_FIELDS:
                 value = details_data.get(field)
                 if value is not None:
-                    try:
-                        setattr(details, field, json.dumps(value))
-                    except (TypeError, ValueError):
-                        setattr(details, field, None)
+                    setattr(details, field, value)
             details.save()
-        
+
         return instance
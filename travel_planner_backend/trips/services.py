@@ -1,210 +1,612 @@
-import requests
-import json
-from datetime import datetime, timedelta
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError, as_completed
+from datetime import date, datetime, timedelta
 import random
 
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from asgiref.sync import sync_to_async
+
+from . import async_http, hotels, http_client, places, tracing, weather
+from .caching import AsyncSingleFlight, SingleFlight, TTLCache
+from .circuit_breaker import CircuitBreaker
+from .concurrency import RateLimiter, get_executor, submit
+from .metrics import instrument_provider
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderError(Exception):
+    """A provider is unreachable or failing (as opposed to having no results)."""
+
 class WeatherService:
+    """Daily forecasts.
+
+    A forecast is a pure function of the city and day (see trips/weather.py),
+    so generated days are kept in an in-process cache keyed by (city seed,
+    day ordinal) and shared by every trip: overlapping trips generate each
+    city-day once, and a range only generates the days it is missing. A
+    process-local TTLCache is used rather than the shared Django cache,
+    because a cache round trip costs more than generating the day.
+    """
+    _day_cache = TTLCache(maxsize=settings.WEATHER_CACHE['MAXSIZE'], ttl=settings.WEATHER_CACHE['TTL'])
+
     @staticmethod
+    def _to_date(value):
+        # Accept both date objects (from Trip) and 'YYYY-MM-DD' strings
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return datetime.strptime(value, '%Y-%m-%d').date()
+
+    @staticmethod
+    @instrument_provider('weather')
     def get_forecast(city, start_date, end_date):
-        """Get dummy weather forecast data."""
-        weather_conditions = ['Sunny', 'Cloudy', 'Rainy', 'Partly Cloudy']
-        
-        try:
-            # Convert string dates to datetime objects
-            start = datetime.strptime(start_date, '%Y-%m-%d')
-            end = datetime.strptime(end_date, '%Y-%m-%d')
-            
-            # Generate weather data for each day
-            forecast_data = []
-            current_date = start
-            
-            while current_date <= end:
-                forecast_data.append({
-                    'date': current_date.strftime('%Y-%m-%d'),
-                    'temperature': random.randint(18, 30),
-                    'condition': random.choice(weather_conditions),
-                    'humidity': random.randint(40, 90)
-                })
-                current_date += timedelta(days=1)
-            
-            return forecast_data
-        except Exception as e:
-            print(f"Error generating weather data: {str(e)}")
-            return []
+        """Get the weather forecast for each day between start and end, inclusive.
+
+        Errors propagate, so callers can tell a failure from an empty range.
+        """
+        start = WeatherService._to_date(start_date)
+        end = WeatherService._to_date(end_date)
+        days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+
+        cache = WeatherService._day_cache
+        seed = weather.city_seed(city)
+        forecast = [cache.get((seed, day.toordinal())) for day in days]
+        missing = [day for day, entry in zip(days, forecast) if entry is None]
+        if missing:
+            generated = dict(zip(missing, weather.generate_days(city, missing)))
+            for day, entry in generated.items():
+                cache.set((seed, day.toordinal()), entry)
+            forecast = [entry if entry is not None else generated[day] for day, entry in zip(days, forecast)]
+        # Copies, so callers can't change the cached days
+        return [dict(entry) for entry in forecast]
+
+    @staticmethod
+    def get_forecasts(ranges):
+        """Generate forecasts for many (city, start_date, end_date) ranges in one pass.
+
+        Returns a weather.ForecastColumns, whose
+        forecast(i) gives the per-day dicts for ranges[i].
+        """
+        return weather.generate(
+            (city, WeatherService._to_date(start), WeatherService._to_date(end))
+            for city, start, end in ranges
+        )
 
 class PlacesService:
     @staticmethod
-    def get_places_of_interest(location, interests):
-        """Get dummy places of interest data."""
-        dummy_places = [
-            {
-                'name': 'Historic City Center',
-                'description': 'Beautiful historic district with architecture from the 18th century',
-                'rating': 4.5,
-                'image': 'https://picsum.photos/400/300',
-                'type': 'Cultural'
-            },
-            {
-                'name': 'Central Park Gardens',
-                'description': 'Expansive park with walking trails and botanical gardens',
-                'rating': 4.7,
-                'image': 'https://picsum.photos/400/301',
-                'type': 'Nature'
-            },
-            {
-                'name': 'Museum of Modern Art',
-                'description': 'World-class museum featuring contemporary artworks',
-                'rating': 4.6,
-                'image': 'https://picsum.photos/400/302',
-                'type': 'Cultural'
-            },
-            {
-                'name': 'Local Food Market',
-                'description': 'Traditional market with local specialties and fresh produce',
-                'rating': 4.4,
-                'image': 'https://picsum.photos/400/303',
-                'type': 'Food'
-            },
-            {
-                'name': 'Adventure Sports Center',
-                'description': 'Various outdoor activities and adventure sports',
-                'rating': 4.3,
-                'image': 'https://picsum.photos/400/304',
-                'type': 'Adventure'
-            }
-        ]
-        return dummy_places
+    @instrument_provider('places')
+    def get_places_of_interest(location, interests, limit=None):
+        """Get the top places in `location` matching the trip's free-text interests.
+
+        [] means nothing matched; errors propagate.
+        """
+        return places.get_index().search(location, interests, limit or settings.PLACES['TOP_K'])
+
+class AmadeusTokenManager:
+    """Cache the Amadeus OAuth access token until shortly before it expires.
+
+    The token is kept in process memory and in the Django cache named by
+    settings.AMADEUS_TOKEN_CACHE, so every thread and worker process shares
+    one token. Refreshes happen under a thread lock plus a cache-based lock,
+    so concurrent searches don't stampede the auth endpoint.
+    """
+    CACHE_KEY = 'amadeus:access_token'
+    LOCK_KEY = 'amadeus:access_token:lock'
+    EXPIRY_MARGIN = 60  # seconds before expires_in at which the token is refreshed
+    LOCK_TIMEOUT = 10   # seconds another process may spend refreshing
+
+    _token = None
+    _expires_at = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _cache():
+        return caches[settings.AMADEUS_TOKEN_CACHE]
+
+    @classmethod
+    def _local_token(cls):
+        if cls._token and time.time() < cls._expires_at:
+            return cls._token
+        return None
+
+    @classmethod
+    def _shared_token(cls):
+        entry = cls._cache().get(cls.CACHE_KEY)
+        if entry and time.time() < entry['expires_at']:
+            cls._token, cls._expires_at = entry['token'], entry['expires_at']
+            return cls._token
+        return None
+
+    @classmethod
+    def get_token(cls):
+        """Return a valid access token, fetching a new one only when needed."""
+        token = cls._local_token()
+        if token:
+            return token
+        with cls._lock:
+            return cls._local_token() or cls._shared_token() or cls._refresh()
+
+    @classmethod
+    def invalidate(cls, token):
+        """Drop `token` from the caches, e.g. after the API rejected it with a 401."""
+        with cls._lock:
+            if cls._token == token:
+                cls._token, cls._expires_at = None, 0
+            entry = cls._cache().get(cls.CACHE_KEY)
+            if entry and entry['token'] == token:
+                cls._cache().delete(cls.CACHE_KEY)
+
+    @classmethod
+    def _refresh(cls):
+        cache = cls._cache()
+        has_lock = cache.add(cls.LOCK_KEY, True, timeout=cls.LOCK_TIMEOUT)
+        try:
+            if not has_lock:
+                # Another process is refreshing; wait for it to publish the token
+                give_up_at = time.monotonic() + cls.LOCK_TIMEOUT
+                while time.monotonic() < give_up_at:
+                    time.sleep(0.1)
+                    token = cls._shared_token()
+                    if token:
+                        return token
+            return cls._fetch_token()
+        finally:
+            if has_lock:
+                cache.delete(cls.LOCK_KEY)
+
+    @classmethod
+    @instrument_provider('amadeus_auth')
+    def _fetch_token(cls):
+        from travel_planner_backend.api_config import AMADEUS_API_KEY, AMADEUS_API_SECRET, AMADEUS_BASE_URL
+
+        auth_url = f"{AMADEUS_BASE_URL}/v1/security/oauth2/token"
+        auth_data = {
+            'grant_type': 'client_credentials',
+            'client_id': AMADEUS_API_KEY,
+            'client_secret': AMADEUS_API_SECRET
+        }
+        auth_response = http_client.post(auth_url, data=auth_data)
+        tracing.trace('amadeus.auth', url=auth_url, status=auth_response.status_code)
+
+        if not auth_response.ok:
+            logger.warning("Amadeus auth failed with status %s", auth_response.status_code)
+            if tracing.sampled():
+                tracing.trace('amadeus.auth.error', body=auth_response.text[:500])
+            return None
+
+        body = auth_response.json()
+        token = body.get('access_token')
+        if not token:
+            return None
+
+        lifetime = max(int(body.get('expires_in', 0)) - cls.EXPIRY_MARGIN, 0)
+        expires_at = time.time() + lifetime
+        if lifetime:
+            cls._cache().set(cls.CACHE_KEY, {'token': token, 'expires_at': expires_at}, timeout=lifetime)
+        cls._token, cls._expires_at = token, expires_at
+        return token
 
 class FlightService:
+    # Formatted Amadeus results keyed by normalized search parameters
+    _offer_cache = TTLCache(
+        maxsize=settings.FLIGHT_OFFER_CACHE['MAXSIZE'],
+        ttl=settings.FLIGHT_OFFER_CACHE['TTL']
+    )
+    _single_flight = SingleFlight()
+    _async_single_flight = AsyncSingleFlight()
+    # Skips Amadeus entirely while it keeps failing; searches fall back to dummy flights
+    _circuit_breaker = CircuitBreaker(
+        failure_threshold=settings.AMADEUS_CIRCUIT_BREAKER['FAILURE_THRESHOLD'],
+        window=settings.AMADEUS_CIRCUIT_BREAKER['WINDOW'],
+        cooldown=settings.AMADEUS_CIRCUIT_BREAKER['COOLDOWN'],
+        half_open_probes=settings.AMADEUS_CIRCUIT_BREAKER['HALF_OPEN_PROBES']
+    )
+    # Cached in place of offers for searches Amadeus answered with nothing usable
+    NO_OFFERS = ()
+    # Caps upstream searches (cache misses) so fan-outs can't exhaust the Amadeus quota
+    _rate_limiter = RateLimiter(
+        rate=settings.AMADEUS_RATE_LIMIT['RATE'],
+        burst=settings.AMADEUS_RATE_LIMIT['BURST']
+    )
+
+    @staticmethod
+    def search_key(origin, destination, departure_date, return_date):
+        """Normalize search parameters: upper-case IATA codes and ISO dates.
+
+        Raises ValueError for malformed values, including non-string JSON values.
+        """
+        def iso(value):
+            if not value:
+                return None
+            if isinstance(value, date):
+                return value.isoformat()
+            if not isinstance(value, str):
+                raise ValueError(f"Invalid date: {value!r}")
+            return datetime.strptime(value.strip(), '%Y-%m-%d').date().isoformat()
+
+        if not isinstance(origin, str) or not isinstance(destination, str):
+            raise ValueError("origin and destination must be IATA code strings")
+        return (origin.strip().upper(), destination.strip().upper(), iso(departure_date), iso(return_date))
+
     @staticmethod
     def get_flight_offers(origin, destination, departure_date, return_date):
-        """Get flight offers using Amadeus API."""
-        from travel_planner_backend.api_config import AMADEUS_API_KEY, AMADEUS_API_SECRET, AMADEUS_BASE_URL
-        import requests
-        import json
-        
+        """Get flight offers, from the offer cache or the Amadeus API.
+
+        Concurrent identical searches share one upstream call. Falls back to
+        dummy flights (which are not cached) when Amadeus has no usable offers,
+        is failing, or its circuit breaker is open.
+        """
         try:
-            print("\n=== Starting Amadeus API Request ===")
-            
-            # First, get the access token
-            auth_url = f"{AMADEUS_BASE_URL}/v1/security/oauth2/token"
-            auth_data = {
-                'grant_type': 'client_credentials',
-                'client_id': AMADEUS_API_KEY,
-                'client_secret': AMADEUS_API_SECRET
+            key = FlightService.search_key(origin, destination, departure_date, return_date)
+        except ValueError as e:
+            logger.info("Invalid flight search dates: %s", e)
+            return FlightService.get_dummy_flights(origin, destination, departure_date, return_date)
+
+        offers = FlightService.find_offers(key)
+        return offers or FlightService.get_dummy_flights(origin, destination, departure_date, return_date)
+
+    @staticmethod
+    async def aget_flight_offers(origin, destination, departure_date, return_date):
+        """get_flight_offers() for async views: the Amadeus call doesn't hold a thread."""
+        try:
+            key = FlightService.search_key(origin, destination, departure_date, return_date)
+        except ValueError as e:
+            logger.info("Invalid flight search dates: %s", e)
+            return FlightService.get_dummy_flights(origin, destination, departure_date, return_date)
+
+        offers = await FlightService.afind_offers(key)
+        return offers or FlightService.get_dummy_flights(origin, destination, departure_date, return_date)
+
+    @staticmethod
+    def find_offers(key):
+        """Return Amadeus offers for a normalized search key, or None (no dummy fallback)."""
+        offers = FlightService._offer_cache.get(key)
+        if offers is None:
+            offers = FlightService._single_flight.do(key, lambda: FlightService._search_and_cache(key))
+        # NO_OFFERS (a cached empty answer) reads as None
+        return offers or None
+
+    @staticmethod
+    async def afind_offers(key):
+        """find_offers() for coroutines; shares the offer cache, rate limiter and circuit breaker."""
+        offers = FlightService._offer_cache.get(key)
+        if offers is None:
+            offers = await FlightService._async_single_flight.do(key, lambda: FlightService._asearch_and_cache(key))
+        return offers or None
+
+    @staticmethod
+    def _search_and_cache(key):
+        # A coalesced leader may start just after another leader filled the cache
+        offers = FlightService._offer_cache.peek(key)
+        if offers is not None:
+            return offers
+
+        breaker = FlightService._circuit_breaker
+        if not breaker.allow():
+            return None
+        if not FlightService._rate_limiter.acquire(timeout=settings.AMADEUS_RATE_LIMIT['MAX_WAIT']):
+            logger.warning("Amadeus rate limit reached, skipping search %s", key)
+            return None
+        try:
+            offers = FlightService._search_flight_offers(*key)
+        except ProviderError as e:
+            breaker.record_failure()
+            logger.warning("Amadeus search failed (circuit %s): %s", breaker.state, e)
+            return None
+        breaker.record_success()
+        return FlightService._cache_result(key, offers)
+
+    @staticmethod
+    async def _asearch_and_cache(key):
+        offers = FlightService._offer_cache.peek(key)
+        if offers is not None:
+            return offers
+
+        breaker = FlightService._circuit_breaker
+        if not breaker.allow():
+            return None
+        if not await FlightService._rate_limiter.aacquire(timeout=settings.AMADEUS_RATE_LIMIT['MAX_WAIT']):
+            logger.warning("Amadeus rate limit reached, skipping search %s", key)
+            return None
+        try:
+            offers = await FlightService._asearch_flight_offers(*key)
+        except ProviderError as e:
+            breaker.record_failure()
+            logger.warning("Amadeus search failed (circuit %s): %s", breaker.state, e)
+            return None
+        breaker.record_success()
+        return FlightService._cache_result(key, offers)
+
+    @staticmethod
+    def _cache_result(key, offers):
+        if offers:
+            FlightService._offer_cache.set(key, offers)
+        else:
+            # Remember briefly that there is nothing to find
+            offers = FlightService.NO_OFFERS
+            FlightService._offer_cache.set(key, offers, ttl=settings.FLIGHT_OFFER_CACHE['NEGATIVE_TTL'])
+        return offers
+
+    @staticmethod
+    def cache_stats():
+        """Hit/miss counters of the flight offer cache, coalesced searches and circuit breaker state."""
+        stats = FlightService._offer_cache.stats()
+        stats['coalesced'] = FlightService._single_flight.coalesced + FlightService._async_single_flight.coalesced
+        stats['circuit_breaker'] = FlightService._circuit_breaker.stats()
+        return stats
+
+    @staticmethod
+    def search_batch(searches):
+        """Run many searches concurrently and return {search id: result}.
+
+        `searches` maps an id to a dict of get_flight_offers() arguments. The
+        searches share the flight-search pool (settings.FLIGHT_SEARCH), so the
+        token, connection pool and offer cache are shared as well.
+        """
+        return dict(FlightService.iter_batch(searches))
+
+    @staticmethod
+    def iter_batch(searches):
+        """Like search_batch() but yield (search id, result) as each search completes."""
+        executor = get_executor('flight-search', settings.FLIGHT_SEARCH['MAX_CONCURRENCY'])
+        futures = {
+            submit(executor, FlightService.get_flight_offers, **params): search_id
+            for search_id, params in searches.items()
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], {'error': str(e)}
+
+    @staticmethod
+    def calendar_dates(departure_date, return_date, flex_days):
+        """Departure and return dates covered by a price calendar (return dates are [None] one-way)."""
+        departure = date.fromisoformat(departure_date)
+        offsets = range(-flex_days, flex_days + 1)
+        departure_dates = [departure + timedelta(days=offset) for offset in offsets]
+        if return_date:
+            ret = date.fromisoformat(return_date)
+            return_dates = [ret + timedelta(days=offset) for offset in offsets]
+        else:
+            return_dates = [None]
+        return departure_dates, return_dates
+
+    @staticmethod
+    def price_calendar(origin, destination, departure_date, return_date=None, flex_days=3):
+        """Cheapest price for every departure/return pair within +/- flex_days.
+
+        Returns {'departure_dates': [...], 'return_dates': [...], 'prices':
+        [[price or None per return date] per departure date], 'currency': ...}.
+        One-way searches have a single None return date. Pairs are fetched in
+        parallel through find_offers(), so cached pairs cost nothing and the
+        rest are paced by the Amadeus rate limiter. Pairs in the past, with
+        the return before departure, or without offers are None.
+        """
+        _, _, departure_date, return_date = FlightService.search_key(origin, destination, departure_date, return_date)
+        departure_dates, return_dates = FlightService.calendar_dates(departure_date, return_date, flex_days)
+
+        cells = {}
+        currency = None
+        for cell in FlightService.iter_price_calendar(origin, destination, departure_date, return_date, flex_days):
+            cells[(cell['departure_date'], cell['return_date'])] = cell['price']
+            currency = currency or cell['currency']
+
+        return {
+            'departure_dates': [d.isoformat() for d in departure_dates],
+            'return_dates': [d.isoformat() if d else None for d in return_dates],
+            'prices': [
+                [cells.get((dep.isoformat(), rd.isoformat() if rd else None)) for rd in return_dates]
+                for dep in departure_dates
+            ],
+            'currency': currency,
+        }
+
+    @staticmethod
+    def iter_price_calendar(origin, destination, departure_date, return_date=None, flex_days=3):
+        """Yield {'departure_date', 'return_date', 'price', 'currency'} as each date pair completes.
+
+        Only searchable pairs are yielded; price is None when there are no offers.
+        """
+        _, _, departure_date, return_date = FlightService.search_key(origin, destination, departure_date, return_date)
+        departure_dates, return_dates = FlightService.calendar_dates(departure_date, return_date, flex_days)
+
+        today = date.today()
+        executor = get_executor('flight-search', settings.FLIGHT_SEARCH['MAX_CONCURRENCY'])
+        futures = {}
+        for dep in departure_dates:
+            for rd in return_dates:
+                if dep >= today and (rd is None or rd >= dep):
+                    key = FlightService.search_key(origin, destination, dep, rd)
+                    futures[submit(executor, FlightService.find_offers, key)] = (dep, rd)
+
+        for future in as_completed(futures):
+            dep, rd = futures[future]
+            try:
+                offers = future.result()
+            except Exception as e:
+                logger.warning("Price calendar search failed for %s/%s: %s", dep, rd, e)
+                offers = None
+            cheapest = min(offers['data'], key=lambda offer: offer['price']) if offers else None
+            yield {
+                'departure_date': dep.isoformat(),
+                'return_date': rd.isoformat() if rd else None,
+                'price': cheapest['price'] if cheapest else None,
+                'currency': cheapest['currency'] if cheapest else None,
             }
-            
-            print(f"\nAuth Request:")
-            print(f"URL: {auth_url}")
-            print(f"Data: {json.dumps(auth_data, indent=2)}")
-            
-            auth_response = requests.post(auth_url, data=auth_data)
-            
-            print(f"\nAuth Response:")
-            print(f"Status Code: {auth_response.status_code}")
-            print(f"Response Headers: {dict(auth_response.headers)}")
-            print(f"Response Body: {auth_response.text}")
-            
-            if not auth_response.ok:
-                print(f"\nAuth Error: {auth_response.status_code} - {auth_response.text}")
-                return FlightService.get_dummy_flights(origin, destination, departure_date, return_date)
-            
-            access_token = auth_response.json().get('access_token')
+
+    @staticmethod
+    def _search_params(origin, destination, departure_date, return_date):
+        """Amadeus flight-offers query parameters, or None if the dates are invalid."""
+        # Convert dates to IATA format (YYYY-MM-DD)
+        try:
+            if isinstance(departure_date, str):
+                departure_date = datetime.strptime(departure_date, '%Y-%m-%d').strftime('%Y-%m-%d')
+            if isinstance(return_date, str):
+                return_date = datetime.strptime(return_date, '%Y-%m-%d').strftime('%Y-%m-%d')
+        except Exception as e:
+            logger.info("Invalid flight search dates: %s", e)
+            return None
+
+        params = {
+            'originLocationCode': origin,
+            'destinationLocationCode': destination,
+            'departureDate': departure_date,
+            'adults': '1',
+            'max': '5'
+        }
+        if return_date:
+            params['returnDate'] = return_date
+        return params
+
+    @staticmethod
+    def _parse_search_response(response, origin, destination, departure_date):
+        """Formatted offers from an Amadeus search response, or None if there are none.
+
+        Raises ProviderError on a rate limit or server error.
+        """
+        if tracing.sampled():
+            tracing.trace(
+                'amadeus.search.response',
+                status=response.status_code,
+                headers=dict(response.headers),
+                body=response.text[:1000]
+            )
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise ProviderError(f"Amadeus flight search returned {response.status_code}")
+        if response.status_code >= 400:
+            logger.warning("Amadeus flight search failed with status %s", response.status_code)
+            return None
+
+        flight_data = response.json()
+
+        if not flight_data.get('data'):
+            logger.info("No flight offers found for %s-%s on %s", origin, destination, departure_date)
+            return None
+
+        # Format the response
+        formatted_flights = []
+        for offer in flight_data['data']:
+            try:
+                itinerary = offer['itineraries'][0]
+                segment = itinerary['segments'][0]
+                price = offer['price']['total']
+
+                formatted_flights.append({
+                    'airline': segment['carrierCode'],
+                    'flight_number': f"{segment['carrierCode']}{segment['number']}",
+                    'departure': {
+                        'city': origin,
+                        'date': segment['departure']['at'].split('T')[0],
+                        'time': segment['departure']['at'].split('T')[1].split('.')[0]
+                    },
+                    'arrival': {
+                        'city': destination,
+                        'date': segment['arrival']['at'].split('T')[0],
+                        'time': segment['arrival']['at'].split('T')[1].split('.')[0]
+                    },
+                    'price': float(price),
+                    'currency': offer['price']['currency'],
+                    'booking_code': offer['id']
+                })
+            except (KeyError, IndexError) as e:
+                logger.warning("Error formatting flight offer: %r", e)
+                continue
+
+        if not formatted_flights:
+            logger.warning("No valid flight offers could be formatted")
+            return None
+
+        return {'data': formatted_flights}
+
+    @staticmethod
+    @instrument_provider('amadeus_search')
+    def _search_flight_offers(origin, destination, departure_date, return_date):
+        """Search the Amadeus API; returns None when there are no usable offers.
+
+        Raises ProviderError when Amadeus is unreachable, fails to authenticate
+        or answers with a server error or rate limit.
+        """
+        from travel_planner_backend.api_config import AMADEUS_BASE_URL
+        
+        try:
+            # Reuse the cached access token; only hits the auth endpoint when it expired
+            access_token = AmadeusTokenManager.get_token()
             if not access_token:
-                print("\nNo access token received")
-                return FlightService.get_dummy_flights(origin, destination, departure_date, return_date)
+                raise ProviderError("No Amadeus access token")
             
             # Search for flights
             url = f"{AMADEUS_BASE_URL}/v2/shopping/flight-offers"
             headers = {
                 'Authorization': f'Bearer {access_token}'
             }
+            params = FlightService._search_params(origin, destination, departure_date, return_date)
+            if params is None:
+                return None
             
-            # Convert dates to IATA format (YYYY-MM-DD)
-            try:
-                from datetime import datetime
-                if isinstance(departure_date, str):
-                    departure_date = datetime.strptime(departure_date, '%Y-%m-%d').strftime('%Y-%m-%d')
-                if isinstance(return_date, str):
-                    return_date = datetime.strptime(return_date, '%Y-%m-%d').strftime('%Y-%m-%d')
-            except Exception as e:
-                print(f"\nDate formatting error: {e}")
-                return FlightService.get_dummy_flights(origin, destination, departure_date, return_date)
-            
-            params = {
-                'originLocationCode': origin,
-                'destinationLocationCode': destination,
-                'departureDate': departure_date,
-                'adults': '1',
-                'max': '5'
-            }
-            
-            if return_date:
-                params['returnDate'] = return_date
-            
-            print(f"\nFlight Search Request:")
-            print(f"URL: {url}")
-            print(f"Headers: {json.dumps(headers, indent=2)}")
-            print(f"Params: {json.dumps(params, indent=2)}")
-            
-            response = requests.get(url, headers=headers, params=params)
-            
-            print(f"\nFlight Search Response:")
-            print(f"Status Code: {response.status_code}")
-            print(f"Response Headers: {dict(response.headers)}")
-            print(f"Response Body: {response.text[:1000]}...")  # First 1000 chars to avoid too much output
-            
-            if not response.ok:
-                print(f"\nFlight Search Error: {response.status_code} - {response.text}")
-                return FlightService.get_dummy_flights(origin, destination, departure_date, return_date)
+            tracing.trace('amadeus.search.request', url=url, params=params)
             
-            flight_data = response.json()
+            response = http_client.get(url, headers=headers, params=params)
+            if response.status_code == 401:
+                # Token revoked or expired early: refresh once and retry
+                AmadeusTokenManager.invalidate(access_token)
+                access_token = AmadeusTokenManager.get_token()
+                if access_token:
+                    headers['Authorization'] = f'Bearer {access_token}'
+                    response = http_client.get(url, headers=headers, params=params)
             
-            if not flight_data.get('data'):
-                print("\nNo flight offers found")
-                return FlightService.get_dummy_flights(origin, destination, departure_date, return_date)
-            
-            # Format the response
-            formatted_flights = []
-            for offer in flight_data['data']:
-                try:
-                    itinerary = offer['itineraries'][0]
-                    segment = itinerary['segments'][0]
-                    price = offer['price']['total']
-                    
-                    formatted_flights.append({
-                        'airline': segment['carrierCode'],
-                        'flight_number': f"{segment['carrierCode']}{segment['number']}",
-                        'departure': {
-                            'city': origin,
-                            'date': segment['departure']['at'].split('T')[0],
-                            'time': segment['departure']['at'].split('T')[1].split('.')[0]
-                        },
-                        'arrival': {
-                            'city': destination,
-                            'date': segment['arrival']['at'].split('T')[0],
-                            'time': segment['arrival']['at'].split('T')[1].split('.')[0]
-                        },
-                        'price': float(price),
-                        'currency': offer['price']['currency'],
-                        'booking_code': offer['id']
-                    })
-                except (KeyError, IndexError) as e:
-                    print(f"\nError formatting flight offer: {e}")
-                    continue
-            
-            if not formatted_flights:
-                print("\nNo valid flight offers could be formatted")
-                return FlightService.get_dummy_flights(origin, destination, departure_date, return_date)
-            
-            print("\n=== Flight Search Completed Successfully ===")
-            return {'data': formatted_flights}
+            return FlightService._parse_search_response(response, origin, destination, departure_date)
             
+        except ProviderError:
+            raise
         except Exception as e:
-            print(f"\nAmadeus API error: {str(e)}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
-            return FlightService.get_dummy_flights(origin, destination, departure_date, return_date)
+            # Network errors, timeouts and unreadable responses
+            raise ProviderError(f"Amadeus API error: {e!r}") from e
+
+    @staticmethod
+    @instrument_provider('amadeus_search')
+    async def _asearch_flight_offers(origin, destination, departure_date, return_date):
+        """_search_flight_offers() over the async HTTP client."""
+        from travel_planner_backend.api_config import AMADEUS_BASE_URL
+
+        # The in-memory token needs no I/O; shared-cache reads and refreshes run on a worker thread
+        get_token = sync_to_async(AmadeusTokenManager.get_token, thread_sensitive=False)
+        try:
+            access_token = AmadeusTokenManager._local_token() or await get_token()
+            if not access_token:
+                raise ProviderError("No Amadeus access token")
+
+            url = f"{AMADEUS_BASE_URL}/v2/shopping/flight-offers"
+            headers = {'Authorization': f'Bearer {access_token}'}
+            params = FlightService._search_params(origin, destination, departure_date, return_date)
+            if params is None:
+                return None
+
+            tracing.trace('amadeus.search.request', url=url, params=params)
+
+            response = await async_http.get(url, headers=headers, params=params)
+            if response.status_code == 401:
+                await sync_to_async(AmadeusTokenManager.invalidate, thread_sensitive=False)(access_token)
+                access_token = await get_token()
+                if access_token:
+                    headers['Authorization'] = f'Bearer {access_token}'
+                    response = await async_http.get(url, headers=headers, params=params)
+
+            return FlightService._parse_search_response(response, origin, destination, departure_date)
+
+        except ProviderError:
+            raise
+        except Exception as e:
+            raise ProviderError(f"Amadeus API error: {e!r}") from e
     
     @staticmethod
     def get_dummy_flights(origin, destination, departure_date, return_date):
@@ -237,25 +639,184 @@ class FlightService:
 
 class HotelService:
     @staticmethod
-    def get_hotel_recommendations(city, check_in, check_out, budget_per_night):
-        """Get dummy hotel recommendations data."""
-        hotel_names = ['Grand Hotel', 'City Center Inn', 'Luxury Resort', 'Business Hotel', 'Boutique Stay']
-        amenities = ['WiFi', 'Pool', 'Spa', 'Gym', 'Restaurant', 'Bar', 'Room Service', 'Parking']
-        
-        dummy_hotels = []
-        for i, name in enumerate(hotel_names):
-            price = min(random.randint(100, 300), float(budget_per_night))
-            dummy_hotels.append({
-                'name': f'{name} {city}',
-                'address': f'{random.randint(1, 999)} Main Street, {city}',
-                'rating': round(random.uniform(3.5, 5.0), 1),
-                'price_per_night': price,
-                'total_price': price * (datetime.strptime(check_out, '%Y-%m-%d') - datetime.strptime(check_in, '%Y-%m-%d')).days,
-                'currency': 'USD',
-                'image': f'https://picsum.photos/400/{305 + i}',
-                'amenities': random.sample(amenities, random.randint(3, 6)),
-                'description': 'A wonderful hotel in a prime location with excellent service and modern amenities.',
-                'available_rooms': random.randint(1, 10)
-            })
-        
-        return dummy_hotels
+    @instrument_provider('hotels')
+    def get_hotel_recommendations(city, check_in, check_out, budget_per_night, amenities=None,
+                                  min_price=None, sort=hotels.SORT_RATING, limit=None, strict_budget=False):
+        """Get the top hotels in `city` within the nightly budget that have all `amenities`.
+
+        When nothing fits the budget, the cheapest matching hotels are
+        returned instead, unless `strict_budget` is set. [] means no hotel
+        matched; errors propagate.
+        """
+        nights = (WeatherService._to_date(check_out) - WeatherService._to_date(check_in)).days
+        index = hotels.get_index()
+        amenity_mask = hotels.amenity_mask(amenities or ())
+        limit = limit or settings.HOTELS['TOP_K']
+        matches = index.search(
+            city,
+            min_price=min_price,
+            max_price=None if budget_per_night is None else float(budget_per_night),
+            amenities=amenity_mask,
+            sort=sort,
+            limit=limit,
+        )
+        if not matches and budget_per_night is not None and not strict_budget:
+            matches = index.search(
+                city, min_price=min_price, amenities=amenity_mask, sort=hotels.SORT_PRICE, limit=limit
+            )
+
+        results = []
+        for hotel in matches:
+            result = {field: value for field, value in hotel.items() if field != 'city'}
+            result['total_price'] = hotel['price_per_night'] * max(nights, 1)
+            results.append(result)
+        return results
+
+
+class TripEnrichmentService:
+    """Fetch weather, hotels and places for a trip concurrently.
+
+    The three lookups run on a shared, bounded thread pool. Each provider has
+    its own timeout and the whole enrichment has an overall deadline, so a trip
+    costs only the slowest provider and late providers are left out of the
+    result instead of holding up the request.
+    """
+    # provider name -> TripDetail field it fills
+    FIELDS = {
+        'weather': 'weather_data',
+        'hotels': 'hotel_data',
+        'places': 'food_data',
+    }
+    # provider name -> TripDetail field recording when it was last fetched
+    FETCHED_AT = {
+        'weather': 'weather_fetched_at',
+        'hotels': 'hotel_fetched_at',
+        'places': 'food_fetched_at',
+    }
+    # Trip field -> providers whose results depend on it
+    DEPENDENCIES = {
+        'destination': ('weather', 'hotels', 'places'),
+        'start_date': ('weather', 'hotels'),
+        'end_date': ('weather', 'hotels'),
+        'budget': ('hotels',),
+        'interests': ('places',),
+    }
+
+    @staticmethod
+    def budget_per_night(trip):
+        trip_duration = (trip.end_date - trip.start_date).days
+        return float(trip.budget) / trip_duration if trip_duration > 0 else float(trip.budget)
+
+    @classmethod
+    def _lookups(cls, trip):
+        return {
+            'weather': lambda: WeatherService.get_forecast(
+                trip.destination,
+                trip.start_date,
+                trip.end_date
+            ),
+            'hotels': lambda: HotelService.get_hotel_recommendations(
+                city=trip.destination,
+                check_in=trip.start_date.isoformat(),
+                check_out=trip.end_date.isoformat(),
+                budget_per_night=cls.budget_per_night(trip)
+            ),
+            'places': lambda: PlacesService.get_places_of_interest(
+                trip.destination,
+                trip.interests
+            ),
+        }
+
+    @classmethod
+    def enrich(cls, trip, providers=None):
+        """Run the provider lookups for a trip and return {provider: data}.
+
+        Providers that raise, time out or miss the overall deadline map to
+        None; [] means the provider found nothing.
+        """
+        config = settings.TRIP_ENRICHMENT
+        lookups = cls._lookups(trip)
+        providers = list(providers or cls.FIELDS)
+
+        started = time.monotonic()
+        deadline = started + config['DEADLINE']
+        executor = get_executor('trip-enrichment', config['MAX_WORKERS'])
+        futures = {name: submit(executor, lookups[name]) for name in providers}
+
+        results = {}
+        for name, future in futures.items():
+            timeout = config['PROVIDER_TIMEOUTS'].get(name, config['PROVIDER_TIMEOUT'])
+            remaining = min(started + timeout, deadline) - time.monotonic()
+            try:
+                results[name] = future.result(timeout=max(remaining, 0))
+            except FutureTimeoutError:
+                future.cancel()
+                logger.warning("Enrichment provider '%s' timed out for trip %s", name, trip.id)
+                results[name] = None
+            except Exception as e:
+                logger.exception("Enrichment provider '%s' failed for trip %s", name, trip.id)
+                results[name] = None
+        return results
+
+    @classmethod
+    async def aenrich(cls, trip, providers=None):
+        """enrich() for async views: awaits the lookups instead of blocking a thread on them.
+
+        The lookups themselves are local and CPU-bound, so they still run on
+        the enrichment pool, with the same timeouts and deadline.
+        """
+        config = settings.TRIP_ENRICHMENT
+        lookups = cls._lookups(trip)
+        providers = list(providers or cls.FIELDS)
+        executor = get_executor('trip-enrichment', config['MAX_WORKERS'])
+
+        async def run(name):
+            # All lookups start together, so the deadline caps each timeout
+            timeout = min(config['PROVIDER_TIMEOUTS'].get(name, config['PROVIDER_TIMEOUT']), config['DEADLINE'])
+            future = submit(executor, lookups[name])
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Enrichment provider '%s' timed out for trip %s", name, trip.id)
+            except Exception:
+                logger.exception("Enrichment provider '%s' failed for trip %s", name, trip.id)
+            return None
+
+        return dict(zip(providers, await asyncio.gather(*(run(name) for name in providers))))
+
+    @classmethod
+    def affected_providers(cls, changed_fields):
+        """Providers whose results change when the given Trip fields change."""
+        affected = {name for field in changed_fields for name in cls.DEPENDENCIES.get(field, ())}
+        return [name for name in cls.FIELDS if name in affected]
+
+    @classmethod
+    def stale_providers(cls, trip_detail, now=None):
+        """Providers never fetched for this TripDetail or fetched longer ago than their TTL."""
+        ttls = settings.TRIP_ENRICHMENT['SECTION_TTLS']
+        now = now or timezone.now()
+        stale = []
+        for name, field in cls.FETCHED_AT.items():
+            fetched_at = getattr(trip_detail, field)
+            ttl = ttls.get(name)
+            if fetched_at is None or (ttl is not None and now - fetched_at >= timedelta(seconds=ttl)):
+                stale.append(name)
+        return stale
+
+    @classmethod
+    def apply(cls, trip_detail, results):
+        """Store provider results on a TripDetail and return the updated fields.
+
+        An empty result (e.g. no hotels within budget) is a successful fetch and
+        is stored and dated like any other; only failed or timed-out providers
+        (None) are skipped, so they stay stale and are retried.
+        """
+        now = timezone.now()
+        updated_fields = []
+        for name, data in results.items():
+            if data is not None:
+                field = cls.FIELDS[name]
+                setattr(trip_detail, field, data)
+                setattr(trip_detail, cls.FETCHED_AT[name], now)
+                updated_fields += [field, cls.FETCHED_AT[name]]
+        return updated_fields
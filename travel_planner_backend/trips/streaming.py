@@ -0,0 +1,38 @@
+"""
+Streaming response bodies that stream under both WSGI and ASGI.
+
+Django 4.2 serves a sync iterator under ASGI by collecting it into a list
+first (and an async iterator under WSGI the same way), which buffers the
+whole body before the first byte is sent. content() hands
+StreamingHttpResponse the kind of iterator the running server consumes
+lazily: the sync iterator itself under WSGI, and under ASGI an async
+iterator that advances it on the request's sync thread.
+"""
+import itertools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+def _next_batch(iterator, size):
+    return list(itertools.islice(iterator, size))
+
+
+async def _iterate_async(iterator, batch_size):
+    # Thread-sensitive: the generator may run queries on the request's connection
+    next_batch = sync_to_async(_next_batch)
+    while True:
+        batch = await next_batch(iterator, batch_size)
+        if not batch:
+            return
+        for item in batch:
+            yield item
+
+
+def content(iterable, batch_size=1):
+    """Streaming content for `iterable` suited to the server; under ASGI, items are
+    pulled `batch_size` at a time per thread hop."""
+    iterator = iter(iterable)
+    if settings.SERVING_ASGI:
+        return _iterate_async(iterator, batch_size)
+    return iterator
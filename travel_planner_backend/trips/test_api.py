@@ -1,4 +1,5 @@
 import requests
+from . import http_client
 from travel_planner_backend.api_config import GOOGLE_PLACES_API_KEY, GOOGLE_PLACES_BASE_URL
 
 def test_places_api():
@@ -10,7 +11,7 @@ def test_places_api():
     }
     
     try:
-        response = requests.get(url, params=params)
+        response = http_client.get(url, params=params)
         response.raise_for_status()  # Raises an HTTPError if the status is 4XX, 5XX
         data = response.json()
         
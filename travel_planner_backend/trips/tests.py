@@ -1,3 +1,1055 @@
-from django.test import TestCase
+import asyncio
+import importlib
+import json
+import logging
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Prefetch
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+import requests
+from rest_framework.test import APIRequestFactory
+
+from . import async_http, hotels, http_client, metrics, response_cache, tracing, weather
+from .bulk import export_trips, import_trips
+from .caching import AsyncSingleFlight, SingleFlight, TTLCache
+from .circuit_breaker import CircuitBreaker
+from .jobs import claim_next_job, enqueue_enrichment, enqueue_missing_details, run_job
+from .models import EnrichmentJob, Trip, TripDetail
+from .pagination import TripCursorPagination
+from .renderers import RawJSON, SplicingJSONRenderer
+from .serializers import TripSerializer
+from .services import (
+    AmadeusTokenManager, FlightService, HotelService, ProviderError, TripEnrichmentService, WeatherService
+)
+
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_trip(**fields):
+    fields = {
+        'destination': 'Lisbon', 'start_date': date(2027, 3, 1), 'end_date': date(2027, 3, 4),
+        'budget': 1200, 'interests': 'food, museums', **fields
+    }
+    return Trip.objects.create(**fields)
+
+
+class DetailJsonBackfillTests(TransactionTestCase):
+    """Migration 0004 turns the old text blobs into valid JSON before the column type changes."""
+    before = [('trips', '0003_trip_created_id_idx')]
+    after = [('trips', '0004_tripdetail_json_fields')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_to_json_text(self):
+        migration = importlib.import_module('trips.migrations.0004_tripdetail_json_fields')
+        self.assertEqual(migration._to_json_text('[{"a": 1}]'), '[{"a": 1}]')
+        self.assertEqual(migration._to_json_text("[{'a': 1, 'b': None}]"), '[{"a": 1, "b": null}]')
+        self.assertIsNone(migration._to_json_text('not json'))
+        self.assertIsNone(migration._to_json_text(''))
+        self.assertIsNone(migration._to_json_text(None))
+
+    def test_backfill(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        OldTrip = apps.get_model('trips', 'Trip')
+        OldTripDetail = apps.get_model('trips', 'TripDetail')
+        trip = OldTrip.objects.create(
+            destination='Paris', start_date=date(2027, 1, 1), end_date=date(2027, 1, 3),
+            budget=500, interests='art'
+        )
+        detail = OldTripDetail.objects.create(
+            trip=trip,
+            weather_data='[{"date": "2027-01-01", "temperature": 20}]',
+            hotel_data="[{'name': 'Hotel', 'price_per_night': 90.5, 'pool': True}]",
+            food_data='garbage',
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.after)
+        apps = executor.loader.project_state(self.after).apps
+        migrated = apps.get_model('trips', 'TripDetail').objects.get(pk=detail.pk)
+        self.assertEqual(migrated.weather_data, [{'date': '2027-01-01', 'temperature': 20}])
+        self.assertEqual(migrated.hotel_data, [{'name': 'Hotel', 'price_per_night': 90.5, 'pool': True}])
+        self.assertIsNone(migrated.food_data)
+
+
+class SplicingRendererTests(TestCase):
+
+    def test_raw_json_is_spliced_verbatim(self):
+        rendered = SplicingJSONRenderer().render({'a': RawJSON('[1, 2.50]'), 'b': 'x', 'c': [RawJSON('{}')]})
+        self.assertEqual(rendered, b'{"a":[1, 2.50],"b":"x","c":[{}]}')
+
+    def test_matches_regular_rendering(self):
+        trip = Trip.objects.create(
+            destination='Rome', start_date=date(2027, 1, 1), end_date=date(2027, 1, 4),
+            budget=900, interests='history'
+        )
+        TripDetail.objects.create(
+            trip=trip, weather_data=[{'date': '2027-01-01', 'condition': 'Sunny "hot"'}],
+            hotel_data=[], food_data=None
+        )
+        raw = Trip.objects.prefetch_related(
+            Prefetch('details', queryset=TripDetail.objects.with_raw_json())
+        ).get(pk=trip.pk)
+        decoded = Trip.objects.prefetch_related('details').get(pk=trip.pk)
+
+        spliced = SplicingJSONRenderer().render(TripSerializer(raw).data)
+        regular = JSONRenderer().render(TripSerializer(decoded).data)
+        self.assertEqual(JSONRenderer().render(json.loads(spliced)), regular)
+
+
+class TripCursorPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        start = date(2027, 1, 1)
+        trips = [
+            Trip.objects.create(
+                destination=f'City {n}', start_date=start, end_date=start + timedelta(days=2),
+                budget=100, interests='art'
+            )
+            for n in range(7)
+        ]
+        # Ties on created_at must be broken by id
+        created = timezone.now()
+        Trip.objects.filter(pk__in=[trip.pk for trip in trips[:4]]).update(created_at=created)
+        Trip.objects.filter(pk__in=[trip.pk for trip in trips[4:]]).update(created_at=created + timedelta(seconds=1))
+        cls.expected = [trip.pk for trip in reversed(trips[4:])] + [trip.pk for trip in reversed(trips[:4])]
+
+    def paginate(self, url):
+        paginator = TripCursorPagination()
+        request = Request(APIRequestFactory().get(url))
+        page = paginator.paginate_queryset(Trip.objects.all(), request)
+        return paginator, [trip.pk for trip in page]
+
+    def test_walks_every_trip_once_newest_first(self):
+        seen = []
+        pages = []
+        url = '/api/trips/?page_size=3'
+        while url:
+            paginator, ids = self.paginate(url)
+            seen += ids
+            pages.append((url, ids))
+            url = paginator.get_next_link()
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(ids) for _, ids in pages], [3, 3, 1])
+
+        # The previous link of the last page leads back to the middle page
+        last_url, _ = pages[-1]
+        paginator, _ = self.paginate(last_url)
+        _, previous_ids = self.paginate(paginator.get_previous_link())
+        self.assertEqual(previous_ids, pages[1][1])
+
+    def test_first_page_has_no_previous_link(self):
+        paginator, ids = self.paginate('/api/trips/?page_size=10')
+        self.assertEqual(ids, self.expected)
+        self.assertIsNone(paginator.get_previous_link())
+        self.assertIsNone(paginator.get_next_link())
+
+    def test_invalid_cursor_is_not_found(self):
+        for cursor in ['abc', 'eyJ4IjogMX0=', '%%%']:
+            with self.assertRaises(NotFound):
+                self.paginate(f'/api/trips/?cursor={cursor}')
+
+
+class TTLCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch('trips.caching.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entries_expire(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=5)
+        self.clock.now += 10
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.clock.now += 60
+        self.assertEqual(cache.get('a', 'gone'), 'gone')
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIsNone(cache.peek('b'))
+        self.assertEqual((cache.peek('a'), cache.peek('c')), (1, 3))
+
+    def test_peek_does_not_count(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.peek('missing')
+        self.assertEqual((cache.stats()['hits'], cache.stats()['misses']), (0, 0))
+
+
+class SingleFlightTests(SimpleTestCase):
+
+    def run_concurrently(self, single_flight, fn, callers=5):
+        results = [None] * callers
+        started = threading.Barrier(callers)
+
+        def call(index):
+            started.wait()
+            try:
+                results[index] = single_flight.do('key', fn)
+            except Exception as e:
+                results[index] = e
+
+        threads = [threading.Thread(target=call, args=(n,)) for n in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_concurrent_calls_share_one_execution(self):
+        single_flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def fn():
+            calls.append(1)
+            release.wait(5)
+            return {'offers': 1}
+
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        results = self.run_concurrently(single_flight, fn)
+        timer.cancel()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'offers': 1}] * 5)
+        self.assertEqual(single_flight.coalesced, 4)
+
+    def test_errors_reach_every_waiter_and_are_not_remembered(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise RuntimeError('upstream down')
+
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        results = self.run_concurrently(single_flight, fail, callers=3)
+        timer.cancel()
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(single_flight.do('key', lambda: 'recovered'), 'recovered')
+
+
+class AsyncSingleFlightTests(SimpleTestCase):
+
+    def test_concurrent_awaits_share_one_execution(self):
+        single_flight = AsyncSingleFlight()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'offers'
+
+        async def main():
+            return await asyncio.gather(*(single_flight.do('key', fn) for _ in range(4)))
+
+        self.assertEqual(asyncio.run(main()), ['offers'] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(single_flight.coalesced, 3)
+
+
+class FlightOfferCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        FlightService._offer_cache.clear()
+        self.addCleanup(FlightService._offer_cache.clear)
+        patcher = mock.patch.object(
+            FlightService, '_search_flight_offers', return_value={'data': [{'price': 100.0, 'currency': 'USD'}]}
+        )
+        self.search = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_equivalent_searches_share_a_cache_entry(self):
+        first = FlightService.get_flight_offers('par', 'ROM', '2027-01-01', None)
+        second = FlightService.get_flight_offers(' PAR ', 'rom', date(2027, 1, 1), '')
+        self.assertEqual(first, second)
+        self.search.assert_called_once_with('PAR', 'ROM', '2027-01-01', None)
+        self.assertEqual(FlightService._offer_cache.stats()['hits'], 1)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch('trips.circuit_breaker.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=3, window=30, cooldown=10, half_open_probes=1)
+
+    def fail(self, times):
+        for _ in range(times):
+            self.breaker.record_failure()
+
+    def test_opens_after_threshold_failures_within_window(self):
+        self.fail(2)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.fail(1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.stats()['rejected'], 1)
+
+    def test_failures_outside_window_do_not_count(self):
+        self.fail(2)
+        self.clock.now += 31
+        self.fail(1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_probe_success_closes(self):
+        self.fail(3)
+        self.clock.now += 10
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())  # only one probe at a time
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_half_open_probe_failure_reopens(self):
+        self.fail(3)
+        self.clock.now += 10
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_lost_probe_is_replaced_after_cooldown(self):
+        self.fail(3)
+        self.clock.now += 10
+        self.assertTrue(self.breaker.allow())
+        self.clock.now += 10
+        self.assertTrue(self.breaker.allow())
+
+
+class FlightSearchFailureTests(SimpleTestCase):
+
+    def setUp(self):
+        FlightService._offer_cache.clear()
+        self.addCleanup(FlightService._offer_cache.clear)
+        breaker = CircuitBreaker(failure_threshold=2, window=30, cooldown=60)
+        patcher = mock.patch.object(FlightService, '_circuit_breaker', breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def search(self, departure_date):
+        return FlightService.find_offers(FlightService.search_key('PAR', 'ROM', departure_date, None))
+
+    def test_open_circuit_skips_amadeus(self):
+        with mock.patch.object(FlightService, '_search_flight_offers', side_effect=ProviderError('503')) as search:
+            self.assertIsNone(self.search('2027-01-01'))
+            self.assertIsNone(self.search('2027-01-02'))
+            self.assertEqual(FlightService._circuit_breaker.state, CircuitBreaker.OPEN)
+            self.assertIsNone(self.search('2027-01-03'))
+        self.assertEqual(search.call_count, 2)
+        # Failures are not cached
+        self.assertIsNone(FlightService._offer_cache.peek(FlightService.search_key('PAR', 'ROM', '2027-01-01', None)))
+
+    def test_no_offers_are_cached_briefly(self):
+        with mock.patch.object(FlightService, '_search_flight_offers', return_value=None) as search:
+            self.assertIsNone(self.search('2027-01-01'))
+            self.assertIsNone(self.search('2027-01-01'))
+        search.assert_called_once()
+        self.assertEqual(FlightService._circuit_breaker.state, CircuitBreaker.CLOSED)
+
+
+class TripEnrichmentSectionTests(TestCase):
+
+    def test_affected_providers(self):
+        self.assertEqual(TripEnrichmentService.affected_providers(['budget']), ['hotels'])
+        self.assertEqual(
+            TripEnrichmentService.affected_providers(['interests', 'end_date']), ['weather', 'hotels', 'places']
+        )
+        self.assertEqual(TripEnrichmentService.affected_providers(['destination']), ['weather', 'hotels', 'places'])
+        self.assertEqual(TripEnrichmentService.affected_providers(['updated_at']), [])
+
+    def test_stale_providers(self):
+        now = timezone.now()
+        trip_detail = TripDetail(
+            weather_fetched_at=now - timedelta(hours=4),    # TTL 3 hours
+            hotel_fetched_at=now - timedelta(minutes=5),    # TTL 1 hour
+            food_fetched_at=None,
+        )
+        with self.settings(TRIP_ENRICHMENT={
+            **settings.TRIP_ENRICHMENT, 'SECTION_TTLS': {'weather': 3 * 60 * 60, 'hotels': 60 * 60, 'places': None}
+        }):
+            self.assertEqual(TripEnrichmentService.stale_providers(trip_detail, now), ['weather', 'places'])
+            trip_detail.food_fetched_at = now - timedelta(days=365)
+            self.assertEqual(TripEnrichmentService.stale_providers(trip_detail, now), ['weather'])
+
+    def test_failing_provider_is_left_stale(self):
+        trip = make_trip()
+        trip_detail = TripDetail.objects.create(trip=trip)
+        with mock.patch.object(hotels, 'get_index', side_effect=RuntimeError('index unavailable')):
+            results = TripEnrichmentService.enrich(trip)
+        self.assertIsNone(results['hotels'])
+        self.assertTrue(results['weather'])
+
+        updated_fields = TripEnrichmentService.apply(trip_detail, results)
+        self.assertNotIn('hotel_data', updated_fields)
+        self.assertIsNone(trip_detail.hotel_fetched_at)
+        self.assertEqual(TripEnrichmentService.stale_providers(trip_detail), ['hotels'])
+
+    def test_empty_result_is_dated(self):
+        trip = make_trip()
+        trip_detail = TripDetail.objects.create(trip=trip)
+        index = mock.Mock(**{'search.return_value': []})
+        with mock.patch.object(hotels, 'get_index', return_value=index):
+            results = TripEnrichmentService.enrich(trip, ['hotels'])
+        self.assertEqual(results, {'hotels': []})
+
+        TripEnrichmentService.apply(trip_detail, results)
+        self.assertEqual(trip_detail.hotel_data, [])
+        self.assertIsNotNone(trip_detail.hotel_fetched_at)
+        self.assertNotIn('hotels', TripEnrichmentService.stale_providers(trip_detail))
+
+
+class ProviderMetricsTests(TestCase):
+
+    def setUp(self):
+        metrics.PROVIDER_DURATION.clear()
+        self.addCleanup(metrics.PROVIDER_DURATION.clear)
+
+    def outcomes(self, provider):
+        rendered = metrics.PROVIDER_DURATION.render()
+        return {
+            outcome for outcome in ('ok', 'empty', 'error')
+            if f'_count{{provider="{provider}",outcome="{outcome}"}}' in rendered
+        }
+
+    def test_outcomes(self):
+        @metrics.instrument_provider('test')
+        def provider(result):
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        provider([1])
+        provider([])
+        with self.assertRaises(RuntimeError):
+            provider(RuntimeError())
+        self.assertEqual(self.outcomes('test'), {'ok', 'empty', 'error'})
+
+    def test_async_outcome(self):
+        @metrics.instrument_provider('test')
+        async def provider():
+            raise RuntimeError()
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(provider())
+        self.assertEqual(self.outcomes('test'), {'error'})
+
+    def test_failing_hotel_lookup_is_an_error(self):
+        with mock.patch.object(hotels, 'get_index', side_effect=RuntimeError('index unavailable')):
+            with self.assertRaises(RuntimeError):
+                HotelService.get_hotel_recommendations('Lisbon', '2027-03-01', '2027-03-04', 400)
+            TripEnrichmentService.enrich(make_trip(), ['hotels'])
+        self.assertEqual(self.outcomes('hotels'), {'error'})
+        self.assertIn('outcome="error"', self.client.get('/metrics').content.decode())
+
+
+@override_settings(ENRICHMENT_JOBS={**settings.ENRICHMENT_JOBS, 'IN_PROCESS_WORKER': False})
+class TripListQueryTests(TestCase):
+
+    def make_trips(self, count):
+        for _ in range(count):
+            TripDetail.objects.create(trip=make_trip(), status=TripDetail.STATUS_READY, hotel_data=[{'name': 'Inn'}])
+
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/trips/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        self.make_trips(2)
+        few = self.list_queries()
+        self.make_trips(6)
+        with self.assertNumQueries(few):
+            response = self.client.get('/api/trips/')
+        self.assertEqual(len(response.json()['results']), 8)
+
+    def test_missing_details_are_queued_not_fetched(self):
+        trip = make_trip()
+        with mock.patch.object(TripEnrichmentService, 'enrich') as enrich:
+            response = self.client.get('/api/trips/')
+        enrich.assert_not_called()
+        self.assertEqual(response.json()['results'][0]['details']['status'], TripDetail.STATUS_PENDING)
+        self.assertEqual(trip.enrichment_jobs.count(), 1)
+
+    def test_concurrent_lists_share_the_missing_details(self):
+        trip = make_trip()
+        # Both requests loaded the page before either created the details
+        first, second = (list(Trip.objects.prefetch_related('details')) for _ in range(2))
+        enqueue_missing_details(first)
+        enqueue_missing_details(second)
+        self.assertEqual(first[0].details.pk, second[0].details.pk)
+        self.assertEqual(TripDetail.objects.filter(trip=trip).count(), 1)
+
+
+class HotelIndexTests(SimpleTestCase):
+
+    def test_generated_cities_are_bounded(self):
+        with self.settings(HOTELS={**settings.HOTELS, 'GENERATED_CACHE': {'MAXSIZE': 3, 'TTL': 60}}):
+            index = hotels.HotelIndex([])
+        first = index.search('Atlantis', limit=100)
+        for n in range(10):
+            index.search(f'Nowhere {n}')
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index._generated.stats()['size'], 3)
+        # Evicted cities come back identical
+        self.assertEqual(index.search(' Atlantis', limit=100), first)
+
+    def test_catalog_cities_are_not_generated(self):
+        index = hotels.HotelIndex([
+            {'name': 'Cheap', 'city': 'Porto', 'price_per_night': 50, 'rating': 3.5, 'amenities': ['WiFi']},
+            {'name': 'Spa Hotel', 'city': 'Porto', 'price_per_night': 150, 'rating': 4.8, 'amenities': ['WiFi', 'Spa']},
+        ])
+        self.assertEqual([h['name'] for h in index.search('porto')], ['Spa Hotel', 'Cheap'])
+        self.assertEqual([h['name'] for h in index.search('Porto', max_price=100)], ['Cheap'])
+        spa = hotels.amenity_mask(['spa'])
+        self.assertEqual([h['name'] for h in index.search('Porto', amenities=spa)], ['Spa Hotel'])
+        self.assertEqual(index.search('Porto', min_price=200), [])
+
+
+class HotelBudgetTests(TestCase):
+
+    def test_trip_below_every_price_gets_the_cheapest_hotels(self):
+        results = HotelService.get_hotel_recommendations('Oslo', '2027-03-01', '2027-03-04', budget_per_night=10)
+        self.assertTrue(results)
+        prices = [hotel['price_per_night'] for hotel in results]
+        self.assertEqual(prices, sorted(prices))
+        self.assertEqual(prices[0], min(h['price_per_night'] for h in hotels.generate_hotels('Oslo')))
+
+    def test_strict_budget_is_a_hard_cut(self):
+        self.assertEqual(HotelService.get_hotel_recommendations(
+            'Oslo', '2027-03-01', '2027-03-04', budget_per_night=10, strict_budget=True
+        ), [])
+        response = self.client.get('/api/trips/hotels/search/', {
+            'city': 'Oslo', 'check_in': '2027-03-01', 'check_out': '2027-03-04', 'max_price': 10
+        })
+        self.assertEqual(response.json(), [])
+
+
+@override_settings(ENRICHMENT_JOBS={**settings.ENRICHMENT_JOBS, 'IN_PROCESS_WORKER': False, 'MAX_ATTEMPTS': 2})
+class EnrichmentJobTests(TestCase):
+
+    def setUp(self):
+        self.trip = make_trip()
+
+    def test_enqueue_widens_the_queued_job(self):
+        enqueue_enrichment(self.trip, ['hotels'])
+        enqueue_enrichment(self.trip, ['weather'], mark_pending=False)
+        job = EnrichmentJob.objects.get(trip=self.trip)
+        self.assertEqual(job.providers, ['hotels', 'weather'])
+        self.assertEqual(self.trip.details.status, TripDetail.STATUS_PENDING)
+
+        enqueue_enrichment(self.trip)
+        job.refresh_from_db()
+        self.assertEqual(job.providers, [])
+
+    def test_claim_takes_each_runnable_job_once(self):
+        enqueue_enrichment(self.trip)
+        later = make_trip()
+        EnrichmentJob.objects.create(trip=later, run_after=timezone.now() + timedelta(minutes=5))
+
+        job = claim_next_job()
+        self.assertEqual((job.trip_id, job.status, job.attempts), (self.trip.pk, EnrichmentJob.STATUS_RUNNING, 1))
+        self.assertIsNone(claim_next_job())
+
+    def test_stuck_job_is_requeued_after_the_lease(self):
+        enqueue_enrichment(self.trip)
+        job = claim_next_job()
+        lease = timedelta(seconds=settings.ENRICHMENT_JOBS['LEASE_TIMEOUT'] + 1)
+        EnrichmentJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - lease)
+        self.assertEqual(claim_next_job().pk, job.pk)
+
+    def test_run_job_stores_the_details(self):
+        enqueue_enrichment(self.trip)
+        run_job(claim_next_job())
+        job = EnrichmentJob.objects.get(trip=self.trip)
+        trip_detail = TripDetail.objects.get(trip=self.trip)
+        self.assertEqual(job.status, EnrichmentJob.STATUS_DONE)
+        self.assertEqual(trip_detail.status, TripDetail.STATUS_READY)
+        self.assertTrue(trip_detail.weather_data)
+        self.assertEqual(TripEnrichmentService.stale_providers(trip_detail), [])
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        enqueue_enrichment(self.trip)
+        with mock.patch.object(TripEnrichmentService, 'enrich', return_value={'weather': None, 'hotels': None}):
+            run_job(claim_next_job())
+            job = EnrichmentJob.objects.get(trip=self.trip)
+            self.assertEqual(job.status, EnrichmentJob.STATUS_QUEUED)
+            self.assertEqual(job.last_error, 'Every enrichment provider failed')
+            self.assertGreater(job.run_after, timezone.now())
+            # Not runnable before its retry delay
+            self.assertIsNone(claim_next_job())
+
+            EnrichmentJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            run_job(claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (EnrichmentJob.STATUS_FAILED, 2))
+        self.assertEqual(TripDetail.objects.get(trip=self.trip).status, TripDetail.STATUS_FAILED)
+
+    def test_details_status_rejects_invalid_waits(self):
+        url = f'/api/trips/{self.trip.pk}/details-status/'
+        for wait in ['abc', 'nan', 'inf', '-inf']:
+            self.assertEqual(self.client.get(url, {'wait': wait}).status_code, 400)
+        response = self.client.get(url, {'wait': '-5'})
+        self.assertEqual(response.json(), {'id': self.trip.pk, 'status': TripDetail.STATUS_PENDING})
+
+
+@override_settings(AMADEUS_TOKEN_CACHE='default')
+class AmadeusTokenManagerTests(SimpleTestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+        for name, value in [('_token', None), ('_expires_at', 0)]:
+            patcher = mock.patch.object(AmadeusTokenManager, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.issued = 0
+        patcher = mock.patch('trips.services.http_client.post', side_effect=self.issue_token)
+        self.post = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def issue_token(self, url, data):
+        self.issued += 1
+        token = f'token-{self.issued}'
+        return mock.Mock(ok=True, status_code=200, json=lambda: {'access_token': token, 'expires_in': 1799})
+
+    def test_token_is_reused_until_it_expires(self):
+        self.assertEqual(AmadeusTokenManager.get_token(), 'token-1')
+        self.assertEqual(AmadeusTokenManager.get_token(), 'token-1')
+        self.assertEqual(self.post.call_count, 1)
+
+        # Another worker process finds the token in the shared cache
+        AmadeusTokenManager._token, AmadeusTokenManager._expires_at = None, 0
+        self.assertEqual(AmadeusTokenManager.get_token(), 'token-1')
+        self.assertEqual(self.post.call_count, 1)
+
+        with mock.patch('trips.services.time.time', return_value=AmadeusTokenManager._expires_at + 1):
+            self.assertEqual(AmadeusTokenManager.get_token(), 'token-2')
+
+    def test_invalidated_token_is_refreshed(self):
+        token = AmadeusTokenManager.get_token()
+        AmadeusTokenManager.invalidate(token)
+        self.assertEqual(AmadeusTokenManager.get_token(), 'token-2')
+
+    def test_concurrent_callers_share_one_refresh(self):
+        tokens = []
+        started = threading.Barrier(5)
+
+        def call():
+            started.wait()
+            tokens.append(AmadeusTokenManager.get_token())
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(tokens, ['token-1'] * 5)
+        self.assertEqual(self.post.call_count, 1)
+
+    def test_waits_for_the_process_holding_the_refresh_lock(self):
+        cache = caches['default']
+        cache.add(AmadeusTokenManager.LOCK_KEY, True)
+        publish = threading.Timer(0.2, lambda: cache.set(
+            AmadeusTokenManager.CACHE_KEY, {'token': 'from-other-process', 'expires_at': time.time() + 600}
+        ))
+        publish.start()
+        self.addCleanup(publish.cancel)
+        self.assertEqual(AmadeusTokenManager.get_token(), 'from-other-process')
+        self.post.assert_not_called()
+        # The lock belongs to the other process
+        self.assertTrue(cache.get(AmadeusTokenManager.LOCK_KEY))
+
+
+@override_settings(ENRICHMENT_JOBS={**settings.ENRICHMENT_JOBS, 'IN_PROCESS_WORKER': False})
+class TripResponseCacheTests(TestCase):
+
+    def setUp(self):
+        caches[settings.TRIP_RESPONSE_CACHE['ALIAS']].clear()
+        self.trip = make_trip()
+        now = timezone.now()
+        self.trip_detail = TripDetail.objects.create(
+            trip=self.trip, status=TripDetail.STATUS_READY, hotel_data=[{'name': 'Inn'}], weather_data=[], food_data=[],
+            weather_fetched_at=now, hotel_fetched_at=now, food_fetched_at=now
+        )
+        self.url = f'/api/trips/{self.trip.pk}/'
+
+    def test_unchanged_trip_is_served_from_the_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(1):  # the fingerprint
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+
+    def test_update_invalidates(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.url, {'interests': 'hiking'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(caches[settings.TRIP_RESPONSE_CACHE['ALIAS']].get(response_cache._key(self.trip.pk)))
+        self.assertEqual(self.client.get(self.url).json()['interests'], 'hiking')
+
+    def test_worker_save_changes_the_fingerprint(self):
+        self.client.get(self.url)
+        # A save from another process, which cannot delete this process's entry
+        trip_detail = TripDetail.objects.get(pk=self.trip_detail.pk)
+        trip_detail.hotel_data = [{'name': 'Palace'}]
+        trip_detail.save(update_fields=['hotel_data'])
+        self.assertEqual(self.client.get(self.url).json()['details']['hotel_data'], [{'name': 'Palace'}])
+
+    def test_concurrent_saves_get_distinct_versions(self):
+        first = TripDetail.objects.get(pk=self.trip_detail.pk)
+        second = TripDetail.objects.get(pk=self.trip_detail.pk)
+        first.save(update_fields=['status'])
+        second.save(update_fields=['status'])
+        self.assertEqual(second.version, first.version + 1)
+
+    def test_destroy_invalidates(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.delete(self.url).status_code, 204)
+        self.assertIsNone(caches[settings.TRIP_RESPONSE_CACHE['ALIAS']].get(response_cache._key(self.trip.pk)))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_malformed_id_is_not_found(self):
+        self.assertEqual(self.client.get('/api/trips/abc/').status_code, 404)
+
+
+@override_settings(ENRICHMENT_JOBS={**settings.ENRICHMENT_JOBS, 'IN_PROCESS_WORKER': False})
+class BulkImportExportTests(TestCase):
+
+    def make_trips(self):
+        for n, hotel_data in enumerate([[{'name': 'Inn', 'price_per_night': 80.5}], None, []]):
+            TripDetail.objects.create(trip=make_trip(destination=f'City {n}', budget=100 + n), hotel_data=hotel_data)
+
+    def comparable(self, lines):
+        rows = [json.loads(line) for line in lines]
+        for row in rows:
+            for field in ('id', 'created_at', 'updated_at'):
+                row.pop(field)
+            row['details'] = {field: row['details'][field] for field in TripDetail.JSON_FIELDS}
+        return rows
+
+    def test_round_trip(self):
+        self.make_trips()
+        exported = list(export_trips(chunk_size=2))
+        self.assertEqual(len(exported), 3)
+        self.assertTrue(all(line.endswith(b'\n') for line in exported))
+
+        Trip.objects.all().delete()
+        result = import_trips(exported, chunk_size=2)
+        self.assertEqual(result.as_dict(), {'imported': 3, 'failed': 0, 'errors': []})
+        self.assertEqual(self.comparable(export_trips()), self.comparable(exported))
+        # Only the trip whose details were all empty is left for the worker
+        self.assertEqual(EnrichmentJob.objects.get().trip.destination, 'City 1')
+
+    def test_invalid_lines_are_reported_and_skipped(self):
+        valid = {'destination': 'Rome', 'start_date': '2027-01-01', 'end_date': '2027-01-05', 'budget': '900.00',
+                 'interests': 'art'}
+        lines = [
+            json.dumps(valid),
+            '',
+            '{not json',
+            '[1, 2]',
+            json.dumps({**valid, 'budget': 'lots'}),
+        ]
+        result = import_trips(lines)
+        self.assertEqual((result.imported, result.failed), (1, 3))
+        self.assertEqual([error['line'] for error in result.errors], [3, 4, 5])
+        self.assertIn('budget', result.errors[2]['errors'])
+        self.assertEqual(TripDetail.objects.get().status, TripDetail.STATUS_PENDING)
+        self.assertEqual(EnrichmentJob.objects.count(), 1)
+
+    def test_endpoints(self):
+        response = self.client.post('/api/trips/import/', b'{bad\n', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['failed'], 1)
+
+        self.make_trips()
+        response = self.client.get('/api/trips/export/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual([json.loads(line)['destination'] for line in lines], ['City 0', 'City 1', 'City 2'])
+
+
+class RefreshTripDetailsCommandTests(TestCase):
+
+    def setUp(self):
+        self.trips = [make_trip(destination=f'City {n}') for n in range(5)]
+        self.checkpoint = Path(tempfile.mkdtemp()) / 'checkpoint.json'
+        self.addCleanup(shutil.rmtree, self.checkpoint.parent)
+
+    def refresh(self, *args):
+        out = StringIO()
+        call_command('refresh_trip_details', '--chunk-size', '2', *args, stdout=out, stderr=StringIO())
+        return out.getvalue().splitlines()[-1]
+
+    def refreshed_ids(self):
+        ready = TripDetail.objects.filter(status=TripDetail.STATUS_READY)
+        return list(ready.order_by('trip_id').values_list('trip_id', flat=True))
+
+    def test_checkpoint_and_resume(self):
+        self.checkpoint.write_text(json.dumps({'last_id': self.trips[2].pk}))
+        summary = self.refresh('--checkpoint', str(self.checkpoint), '--resume')
+        self.assertIn('2 refreshed', summary)
+        self.assertEqual(self.refreshed_ids(), [trip.pk for trip in self.trips[3:]])
+        self.assertEqual(
+            json.loads(self.checkpoint.read_text()),
+            {'last_id': self.trips[-1].pk, 'refreshed': 2, 'skipped': 0, 'failed': 0}
+        )
+
+        # Without --resume every trip is considered; the fresh ones are skipped
+        self.assertIn('3 refreshed, 2 up to date', self.refresh('--checkpoint', str(self.checkpoint)))
+        self.assertTrue(all(trip_detail.has_fetched() for trip_detail in TripDetail.objects.all()))
+
+    def test_dry_run_changes_nothing(self):
+        self.assertIn('5 refreshed', self.refresh('--dry-run', '--checkpoint', str(self.checkpoint)))
+        self.assertEqual(TripDetail.objects.count(), 0)
+        self.assertFalse(self.checkpoint.exists())
+
+    def test_failed_trips_are_counted(self):
+        for trip in self.trips:
+            TripDetail.objects.create(trip=trip, weather_data=[], weather_fetched_at=timezone.now())
+        with mock.patch.object(TripEnrichmentService, 'enrich', return_value={'hotels': None, 'places': None}):
+            self.assertIn('0 refreshed, 0 up to date, 5 failed', self.refresh())
+
+    def test_invalid_options(self):
+        with self.assertRaises(CommandError):
+            self.refresh('--resume')
+        self.checkpoint.write_text('not json')
+        with self.assertRaises(CommandError):
+            self.refresh('--checkpoint', str(self.checkpoint), '--resume')
+
+
+class TracingTests(SimpleTestCase):
+
+    def test_redact(self):
+        value = {
+            'Authorization': 'Bearer abc',
+            'params': {'client_secret': 's', 'api_key': 'k', 'key': 'k', 'keyword': 'museum'},
+            'items': [{'password': 'p', 'name': 'n'}],
+            'access_token': 't',
+        }
+        self.assertEqual(tracing.redact(value), {
+            'Authorization': tracing.REDACTED,
+            'params': {'client_secret': tracing.REDACTED, 'api_key': tracing.REDACTED, 'key': tracing.REDACTED,
+                       'keyword': 'museum'},
+            'items': [{'password': tracing.REDACTED, 'name': 'n'}],
+            'access_token': tracing.REDACTED,
+        })
+        self.assertEqual(value['Authorization'], 'Bearer abc')
+
+    def test_only_sampled_requests_are_traced(self):
+        request = APIRequestFactory().get('/', HTTP_X_TRACE='1')
+        with self.settings(TRACING={'SAMPLE_RATE': 0, 'FORCE_HEADER': None}):
+            token = tracing.start_request(request)
+        with self.assertNoLogs('trips.trace'):
+            tracing.trace('event', token='t')
+        tracing.end_request(token)
+
+        with self.settings(TRACING={'SAMPLE_RATE': 0, 'FORCE_HEADER': 'X-Trace'}):
+            token = tracing.start_request(request)
+        self.addCleanup(tracing.end_request, token)
+        with self.assertLogs('trips.trace') as logs:
+            tracing.trace('event', token='t', status=200)
+        self.assertEqual(logs.records[0].data, {'token': tracing.REDACTED, 'status': 200})
+
+    def test_structured_formatter(self):
+        record = logging.LogRecord('trips.views', logging.INFO, __file__, 1, 'Trip %s saved', (3,), None)
+        record.data = {'status': 200}
+        entry = json.loads(tracing.StructuredFormatter().format(record))
+        self.assertEqual(
+            {key: entry[key] for key in ('level', 'logger', 'message', 'data')},
+            {'level': 'INFO', 'logger': 'trips.views', 'message': 'Trip 3 saved', 'data': {'status': 200}}
+        )
+
+
+class ProviderStub(BaseHTTPRequestHandler):
+    """Local provider: /ok answers JSON, /hang never answers in time, anything else 429 with a long Retry-After."""
+    hits = None
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        if self.path == '/hang':
+            time.sleep(1)
+            return
+        if self.path == '/ok':
+            body = b'{"ok": true}'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_response(429)
+        self.send_header('Retry-After', '30')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_provider_stub(test, **settings_overrides):
+    """Start a ProviderStub for the test, with fast provider retries; returns its base URL."""
+    ProviderStub.hits = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ProviderStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    test.addCleanup(server.server_close)
+    test.addCleanup(server.shutdown)
+
+    config = {**settings.PROVIDER_HTTP, 'READ_TIMEOUT': 0.2, 'RETRIES': 2, 'BACKOFF_FACTOR': 0.01}
+    overrides = override_settings(PROVIDER_HTTP=config, **settings_overrides)
+    overrides.enable()
+    test.addCleanup(overrides.disable)
+    return f'http://127.0.0.1:{server.server_port}'
+
+
+class HttpClientRetryTests(SimpleTestCase):
+
+    def setUp(self):
+        self.base_url = serve_provider_stub(self)
+        # A session built from the settings above
+        patcher = mock.patch.object(http_client, '_session', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retry_after_is_not_slept(self):
+        started = time.monotonic()
+        response = http_client.get(f'{self.base_url}/limited')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(len(ProviderStub.hits), 3)
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_read_timeout_is_not_retried(self):
+        with self.assertRaises(requests.exceptions.RequestException):
+            http_client.get(f'{self.base_url}/hang')
+        self.assertEqual(ProviderStub.hits, ['/hang'])
+
+
+@skipIf(async_http.httpx is None, 'httpx is not installed')
+class AsyncHttpTests(SimpleTestCase):
+
+    def setUp(self):
+        self.base_url = serve_provider_stub(self, SERVING_ASGI=True)
+
+    def fetch(self, path, method='GET'):
+        async def send():
+            try:
+                return await async_http.request(method, f'{self.base_url}{path}')
+            finally:
+                await async_http.aclose()
+        return asyncio.run(send())
+
+    def test_json_response(self):
+        response = self.fetch('/ok')
+        self.assertIsInstance(response, async_http.httpx.Response)
+        self.assertEqual(response.json(), {'ok': True})
+        self.assertEqual(ProviderStub.hits, ['/ok'])
+
+    def test_retryable_status_is_retried_without_sleeping_on_retry_after(self):
+        started = time.monotonic()
+        response = self.fetch('/limited')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(len(ProviderStub.hits), 3)
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_read_timeout_is_not_retried(self):
+        with self.assertRaises(async_http.httpx.ReadTimeout):
+            self.fetch('/hang')
+        self.assertEqual(ProviderStub.hits, ['/hang'])
+
+    def test_wsgi_goes_through_sync_session(self):
+        with override_settings(SERVING_ASGI=False), mock.patch.object(http_client, '_session', None):
+            response = self.fetch('/ok')
+        self.assertIsInstance(response, requests.Response)
+        self.assertEqual(response.json(), {'ok': True})
+
+
+class AsgiSettingsTests(SimpleTestCase):
+
+    def test_asgi_settings(self):
+        from travel_planner_backend import settings_asgi
+        self.assertTrue(settings_asgi.SERVING_ASGI)
+        self.assertEqual(settings_asgi.DATABASES['default']['CONN_MAX_AGE'], 0)
+
+    def test_asgi_application_requires_asgi_settings(self):
+        with override_settings(SERVING_ASGI=False), self.assertRaises(ImproperlyConfigured):
+            importlib.reload(importlib.import_module('travel_planner_backend.asgi'))
+
+
+class WeatherCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(WeatherService, '_day_cache', TTLCache(maxsize=100, ttl=60))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(weather, 'generate_days', wraps=weather.generate_days)
+        self.generate_days = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def generated(self):
+        return [day for call in self.generate_days.call_args_list for day in call.args[1]]
+
+    def test_overlapping_ranges_generate_each_day_once(self):
+        first = WeatherService.get_forecast('Paris', '2027-01-01', '2027-01-05')
+        second = WeatherService.get_forecast(' paris', date(2027, 1, 3), date(2027, 1, 8))
+        self.assertEqual(second[:3], first[2:])
+        self.assertEqual([day.day for day in self.generated()], [1, 2, 3, 4, 5, 6, 7, 8])
+        self.assertEqual(second, weather.generate(
+            [('Paris', date(2027, 1, 3), date(2027, 1, 8))]
+        ).forecast(0))
+
+        WeatherService.get_forecast('PARIS', '2027-01-02', '2027-01-07')
+        self.assertEqual(len(self.generated()), 8)
+        self.assertEqual(WeatherService._day_cache.stats()['size'], 8)
+
+    def test_cached_days_are_not_shared_with_callers(self):
+        WeatherService.get_forecast('Rome', '2027-01-01', '2027-01-01')[0]['temperature'] = 99
+        self.assertNotEqual(WeatherService.get_forecast('Rome', '2027-01-01', '2027-01-01')[0]['temperature'], 99)
@@ -0,0 +1,84 @@
+"""
+Structured logging and sampled request tracing.
+
+Regular events go through per-module loggers (`trips.services`,
+`trips.views`, ...) whose levels are set in settings.LOGGING. Detailed
+traces, such as provider request/response summaries or incoming payloads,
+are only emitted for the fraction of requests picked by
+settings.TRACING['SAMPLE_RATE']. They go to the `trips.trace` logger with
+secrets redacted. For an unsampled request, trace() and sampled() cost one
+context variable lookup.
+"""
+import contextvars
+import json
+import logging
+import random
+import re
+import time
+
+from django.conf import settings
+
+REDACTED = '[REDACTED]'
+SECRET_KEY_RE = re.compile(r'authorization|secret|password|token|api[_-]?key|cookie|^key$', re.IGNORECASE)
+
+trace_logger = logging.getLogger('trips.trace')
+
+_sampled = contextvars.ContextVar('trips_trace_sampled', default=False)
+
+
+def start_request(request):
+    """Decide whether this request is traced; returns a token for end_request()."""
+    config = settings.TRACING
+    sampled = config['SAMPLE_RATE'] > 0 and random.random() < config['SAMPLE_RATE']
+    if not sampled and config['FORCE_HEADER']:
+        sampled = request.headers.get(config['FORCE_HEADER']) == '1'
+    return _sampled.set(sampled)
+
+
+def end_request(token):
+    _sampled.reset(token)
+
+
+def sampled():
+    """True while handling a request picked for detailed tracing.
+
+    Check it before building expensive trace payloads.
+    """
+    return _sampled.get()
+
+
+def redact(value):
+    """Copy of `value` with the values of secret-looking keys replaced."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if SECRET_KEY_RE.search(str(key)) else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+def trace(event, **fields):
+    """Emit a detailed trace event if the current request is sampled."""
+    if not _sampled.get():
+        return
+    trace_logger.info(event, extra={'data': redact(fields)})
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any `data` fields."""
+
+    def format(self, record):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data = getattr(record, 'data', None)
+        if data:
+            entry['data'] = data
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
@@ -1,12 +1,21 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TripViewSet, test_google_places, search_flights
+from . import async_views
+from .views import TripViewSet, test_google_places, search_flights, search_flights_batch, search_flights_calendar, flight_cache_stats, search_hotels
 
 router = DefaultRouter()
 router.register(r'trips', TripViewSet)
 
+# Explicit trips/... paths come before the router, whose trips/<pk>/ route would shadow them
 urlpatterns = [
-    path('', include(router.urls)),
     path('trips/search-flights/', search_flights, name='search-flights'),
+    path('trips/search-flights/batch/', search_flights_batch, name='search-flights-batch'),
+    path('trips/search-flights/calendar/', search_flights_calendar, name='search-flights-calendar'),
+    path('trips/search-flights/cache-stats/', flight_cache_stats, name='flight-cache-stats'),
+    path('trips/hotels/search/', search_hotels, name='search-hotels'),
     path('test-places/', test_google_places, name='test-places'),
+    # Async views for the ASGI application (trips/async_views.py)
+    path('async/trips/<int:pk>/', async_views.trip_detail, name='trip-detail-async'),
+    path('async/trips/search-flights/', async_views.search_flights, name='search-flights-async'),
+    path('', include(router.urls)),
 ]
@@ -1,15 +1,52 @@
 from django.shortcuts import render
 from rest_framework import viewsets, status, permissions
 from rest_framework.response import Response
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import action, api_view, renderer_classes
+from rest_framework.settings import api_settings
 from django.core.exceptions import ValidationError
 from .models import Trip, TripDetail
 from .serializers import TripSerializer, TripDetailSerializer
 from django.shortcuts import get_object_or_404
-from .services import WeatherService, PlacesService, FlightService, HotelService
+from .services import WeatherService, PlacesService, FlightService, HotelService, TripEnrichmentService
 from .test_api import test_places_api
+from .pagination import TripCursorPagination
+from .renderers import NDJSONRenderer, SplicingJSONRenderer
+from .jobs import enqueue_enrichment, enqueue_missing_details
+from .bulk import export_trips, import_trips
+from . import hotels, metrics, response_cache, streaming, tracing
+import itertools
+import logging
+import math
+from datetime import datetime
 import json
+import time
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
 from django.db import transaction
+from django.db.models import Prefetch
+
+logger = logging.getLogger(__name__)
+
+# Flight search views can also stream NDJSON
+STREAMING_RENDERERS = api_settings.DEFAULT_RENDERER_CLASSES + [NDJSONRenderer]
+
+def wants_stream(request):
+    """True when the client asked for NDJSON streaming (?stream=1, ?format=ndjson or Accept: application/x-ndjson)."""
+    return (
+        request.query_params.get('stream') in ('1', 'true')
+        or request.accepted_renderer.format == NDJSONRenderer.format
+    )
+
+def ndjson_response(rows):
+    """Stream an iterable of JSON-serializable rows, one per line, as they are produced."""
+    response = StreamingHttpResponse(
+        streaming.content(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows),
+        content_type='application/x-ndjson'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
 
 @api_view(['GET'])
 def test_google_places(request):
@@ -18,8 +55,9 @@ def test_google_places(request):
     return Response(result)
 
 @api_view(['POST'])
+@renderer_classes(STREAMING_RENDERERS)
 def search_flights(request):
-    """Search for flights using Amadeus API."""
+    """Search for flights using Amadeus API; ?stream=1 sends one NDJSON line per offer."""
     try:
         origin = request.data.get('origin')
         destination = request.data.get('destination')
@@ -39,6 +77,8 @@ def search_flights(request):
             return_date=return_date
         )
 
+        if wants_stream(request):
+            return ndjson_response(flight_data['data'])
         return Response(flight_data)
 
     except Exception as e:
@@ -47,176 +87,347 @@ def search_flights(request):
             status=500
         )
 
+@api_view(['POST'])
+@renderer_classes(STREAMING_RENDERERS)
+def search_flights_batch(request):
+    """Run several flight searches concurrently.
+
+    Expects {"searches": [{"id": ..., "origin": ..., "destination": ...,
+    "departure_date": ..., "return_date": ...}, ...]} and returns
+    {"results": {id: flight data or {"error": ...}}}. Searches without an
+    id are keyed by their position in the list. With ?stream=1 each search
+    is sent as an NDJSON line {"id": ..., "result": ...} as soon as it completes.
+    """
+    searches = request.data.get('searches')
+    max_size = settings.FLIGHT_SEARCH['BATCH_MAX_SIZE']
+    if not isinstance(searches, list) or not searches:
+        return Response(
+            {'error': 'searches must be a non-empty list'},
+            status=400
+        )
+    if len(searches) > max_size:
+        return Response(
+            {'error': f'At most {max_size} searches per batch'},
+            status=400
+        )
+
+    valid = {}
+    results = {}
+    for index, search in enumerate(searches):
+        if not isinstance(search, dict):
+            return Response(
+                {'error': f'Search {index} must be an object'},
+                status=400
+            )
+        search_id = str(search.get('id', index))
+        if search_id in valid or search_id in results:
+            return Response(
+                {'error': f'Duplicate search id: {search_id}'},
+                status=400
+            )
+        params = {
+            'origin': search.get('origin'),
+            'destination': search.get('destination'),
+            'departure_date': search.get('departure_date'),
+            'return_date': search.get('return_date'),
+        }
+        if not all([params['origin'], params['destination'], params['departure_date']]):
+            results[search_id] = {'error': 'Missing required parameters'}
+        else:
+            valid[search_id] = params
+
+    if wants_stream(request):
+        # One line per search, in completion order; invalid searches come first
+        rows = itertools.chain(
+            results.items(),
+            FlightService.iter_batch(valid)
+        )
+        return ndjson_response({'id': search_id, 'result': result} for search_id, result in rows)
+
+    results.update(FlightService.search_batch(valid))
+    return Response({'results': results})
+
+@api_view(['POST'])
+@renderer_classes(STREAMING_RENDERERS)
+def search_flights_calendar(request):
+    """Price calendar: cheapest fare for each date pair within +/- flex_days.
+
+    With ?stream=1 each date pair is sent as an NDJSON line as soon as it completes.
+    """
+    origin = request.data.get('origin')
+    destination = request.data.get('destination')
+    departure_date = request.data.get('departure_date')
+    return_date = request.data.get('return_date')
+
+    if not all([origin, destination, departure_date]):
+        return Response(
+            {'error': 'Missing required parameters'},
+            status=400
+        )
+
+    max_flex_days = settings.FLIGHT_SEARCH['CALENDAR_MAX_FLEX_DAYS']
+    try:
+        flex_days = int(request.data.get('flex_days', max_flex_days))
+    except (TypeError, ValueError):
+        flex_days = -1
+    if not 0 <= flex_days <= max_flex_days:
+        return Response(
+            {'error': f'flex_days must be between 0 and {max_flex_days}'},
+            status=400
+        )
+
+    try:
+        FlightService.search_key(origin, destination, departure_date, return_date)
+    except ValueError as e:
+        return Response(
+            {'error': str(e)},
+            status=400
+        )
+
+    if wants_stream(request):
+        # One line per date pair, in completion order
+        return ndjson_response(FlightService.iter_price_calendar(
+            origin=origin,
+            destination=destination,
+            departure_date=departure_date,
+            return_date=return_date,
+            flex_days=flex_days
+        ))
+
+    calendar = FlightService.price_calendar(
+        origin=origin,
+        destination=destination,
+        departure_date=departure_date,
+        return_date=return_date,
+        flex_days=flex_days
+    )
+    return Response(calendar)
+
+@api_view(['GET'])
+def search_hotels(request):
+    """Hotels in a city filtered by nightly price range and required amenities.
+
+    Query params: city, check_in, check_out (required); min_price, max_price,
+    amenities (comma separated, e.g. Pool,Gym), sort (rating|price), limit.
+    """
+    params = request.query_params
+    city = params.get('city')
+    check_in = params.get('check_in')
+    check_out = params.get('check_out')
+
+    if not all([city, check_in, check_out]):
+        return Response(
+            {'error': 'Missing required parameters'},
+            status=400
+        )
+
+    try:
+        nights = (datetime.strptime(check_out, '%Y-%m-%d') - datetime.strptime(check_in, '%Y-%m-%d')).days
+        min_price = float(params['min_price']) if params.get('min_price') else None
+        max_price = float(params['max_price']) if params.get('max_price') else None
+        limit = int(params.get('limit') or settings.HOTELS['TOP_K'])
+        amenities = [name for name in params.get('amenities', '').split(',') if name.strip()]
+        hotels.amenity_mask(amenities)
+    except ValueError as e:
+        return Response(
+            {'error': str(e)},
+            status=400
+        )
+
+    sort = params.get('sort', hotels.SORT_RATING)
+    if sort not in (hotels.SORT_RATING, hotels.SORT_PRICE):
+        return Response(
+            {'error': 'sort must be rating or price'},
+            status=400
+        )
+    if nights < 1 or limit < 1:
+        return Response(
+            {'error': 'check_out must be after check_in and limit must be positive'},
+            status=400
+        )
+
+    results = HotelService.get_hotel_recommendations(
+        city=city,
+        check_in=check_in,
+        check_out=check_out,
+        budget_per_night=max_price,
+        amenities=amenities,
+        min_price=min_price,
+        sort=sort,
+        limit=min(limit, settings.HOTELS['MAX_LIMIT']),
+        strict_budget=True
+    )
+    return Response(results)
+
+def metrics_view(request):
+    """Request, DB, serializer and provider histograms in Prometheus text format."""
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@api_view(['GET'])
+def flight_cache_stats(request):
+    """Hit/miss counters of the flight offer cache."""
+    return Response(FlightService.cache_stats())
+
 # Create your views here.
 
 class TripViewSet(viewsets.ModelViewSet):
-    queryset = Trip.objects.all().order_by('-created_at')
+    queryset = Trip.objects.all().order_by('-created_at', '-id')
     serializer_class = TripSerializer
+    pagination_class = TripCursorPagination
     permission_classes = [permissions.AllowAny]
     http_method_names = ['get', 'post', 'put', 'patch', 'delete']
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        if isinstance(getattr(self.request, 'accepted_renderer', None), SplicingJSONRenderer):
+            # Details come with their stored JSON undecoded; it is spliced into the response as-is
+            queryset = queryset.prefetch_related(
+                Prefetch('details', queryset=TripDetail.objects.with_raw_json())
+            )
+        else:
+            queryset = queryset.prefetch_related('details')
+        return queryset
+
     def retrieve(self, request, *args, **kwargs):
         """Get a single trip with all its details"""
+        # Serve the pre-rendered response while neither the trip nor its details changed
+        cacheable = isinstance(request.accepted_renderer, SplicingJSONRenderer)
+        if cacheable:
+            try:
+                current = response_cache.fingerprint(kwargs['pk'])
+            except (TypeError, ValueError):
+                current = None  # malformed pk: get_object() below answers 404
+            content = response_cache.get(kwargs['pk'], current) if current else None
+            if content is not None:
+                return HttpResponse(content, content_type=request.accepted_renderer.media_type)
+
         instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        data = serializer.data
 
         # Get or create TripDetail
-        trip_detail, created = TripDetail.objects.get_or_create(trip=instance)
+        created = False
+        trip_detail = getattr(instance, 'details', None)
+        if trip_detail is None:
+            trip_detail, created = TripDetail.objects.get_or_create(trip=instance)
+            instance.details = trip_detail
         
-        # Fetch fresh data if details don't exist
-        if created or not any([trip_detail.weather_data, trip_detail.hotel_data, trip_detail.food_data]):
-            try:
-                # Get weather data
-                weather_data = WeatherService.get_forecast(
-                    instance.destination,
-                    instance.start_date,
-                    instance.end_date
-                )
-                trip_detail.weather_data = weather_data
-
-                # Get hotel recommendations
-                trip_duration = (instance.end_date - instance.start_date).days
-                budget_per_night = float(instance.budget) / trip_duration if trip_duration > 0 else float(instance.budget)
-                hotels = HotelService.get_hotel_recommendations(
-                    city=instance.destination,
-                    check_in=instance.start_date.isoformat(),
-                    check_out=instance.end_date.isoformat(),
-                    budget_per_night=budget_per_night
-                )
-                trip_detail.hotel_data = hotels
+        # Fetch fresh data if details don't exist and no background job is on it
+        if created or (not trip_detail.has_fetched() and trip_detail.status != TripDetail.STATUS_PENDING):
+            self._refresh_details(instance, trip_detail)
+        elif trip_detail.status != TripDetail.STATUS_PENDING:
+            # Refresh only the sections that outlived their TTL
+            stale = TripEnrichmentService.stale_providers(trip_detail)
+            if stale and settings.TRIP_ENRICHMENT['STALE_WHILE_REVALIDATE']:
+                # Serve the stale sections now; the worker replaces them
+                enqueue_enrichment(instance, stale, mark_pending=False)
+            elif stale:
+                self._refresh_details(instance, trip_detail, stale)
 
-                # Get places of interest
-                places = PlacesService.get_places_of_interest(
-                    instance.destination,
-                    instance.interests
-                )
-                trip_detail.food_data = places  # Using places API for food recommendations too
+        serializer = self.get_serializer(instance)
+        response = Response(serializer.data)
+        if cacheable:
+            current = (instance.updated_at, trip_detail.version)
+            response.add_post_render_callback(
+                lambda rendered: response_cache.store(instance.pk, current, rendered.content)
+            )
+        return response
 
-                trip_detail.save()
-            except Exception as e:
-                print(f"Error fetching trip details: {str(e)}")
+    def _refresh_details(self, trip, trip_detail, providers=None):
+        """Fetch `providers` (default: all) inline and save whatever came back."""
+        try:
+            results = TripEnrichmentService.enrich(trip, providers)
+            updated_fields = TripEnrichmentService.apply(trip_detail, results)
+            if updated_fields:
+                trip_detail.status = TripDetail.STATUS_READY
+                trip_detail.save(update_fields=updated_fields + ['status'])
+        except Exception as e:
+            logger.exception("Error fetching details for trip %s", trip.id)
 
-        # Add details to response
-        detail_serializer = TripDetailSerializer(trip_detail)
-        data['details'] = detail_serializer.data
-        
+    @action(detail=True, methods=['get'], url_path='details-status')
+    def details_status(self, request, pk=None):
+        """Poll enrichment status; pass ?wait=<seconds> to block until details are ready"""
+        trip = self.get_object()
+        try:
+            wait = float(request.query_params.get('wait', 0))
+            if not math.isfinite(wait):
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"detail": "wait must be a number of seconds"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        wait = min(max(wait, 0), settings.ENRICHMENT_JOBS['MAX_WAIT'])
+
+        deadline = time.monotonic() + wait
+        while True:
+            trip_detail = TripDetail.objects.filter(trip=trip).first()
+            detail_status = trip_detail.status if trip_detail else TripDetail.STATUS_PENDING
+            if detail_status != TripDetail.STATUS_PENDING or time.monotonic() >= deadline:
+                break
+            time.sleep(0.25)
+
+        data = {'id': trip.id, 'status': detail_status}
+        if detail_status == TripDetail.STATUS_READY:
+            data['details'] = TripDetailSerializer(trip_detail).data
         return Response(data)
 
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """Import trips from an NDJSON request body, one trip per line; details are fetched by background jobs"""
+        # Read the body line by line instead of parsing it into request.data
+        stream = request.stream
+        result = import_trips(iter(stream.readline, b'') if stream is not None else ())
+        if result.failed and not result.imported:
+            return Response(result.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.as_dict())
+
+    @action(detail=False, methods=['get'], url_path='export', renderer_classes=STREAMING_RENDERERS)
+    def export(self, request):
+        """Stream every trip with its details as NDJSON, one trip per line"""
+        # Under ASGI each thread hop renders one chunk of trips
+        response = StreamingHttpResponse(
+            streaming.content(export_trips(), batch_size=settings.TRIP_BULK['CHUNK_SIZE']),
+            content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'attachment; filename="trips.ndjson"'
+        return response
+
     def list(self, request, *args, **kwargs):
         """Get all trips with their details"""
+        # Two queries per page (trips, then their details); an invalid cursor is a 404
+        trips = self.paginate_queryset(self.get_queryset())
         try:
-            queryset = self.get_queryset()
-            serializer = self.get_serializer(queryset, many=True)
-            data = serializer.data
-
-            # Fetch details for each trip if they don't exist
-            for trip_data in data:
-                trip = Trip.objects.get(id=trip_data['id'])
-                trip_detail, created = TripDetail.objects.get_or_create(trip=trip)
-                
-                # Only fetch fresh data if details don't exist
-                if created or not any([trip_detail.weather_data, trip_detail.hotel_data, trip_detail.food_data]):
-                    try:
-                        # Get weather data
-                        weather_data = WeatherService.get_forecast(
-                            trip.destination,
-                            trip.start_date,
-                            trip.end_date
-                        )
-                        trip_detail.weather_data = json.dumps(weather_data) if weather_data else None
-
-                        # Get hotel recommendations
-                        trip_duration = (trip.end_date - trip.start_date).days
-                        budget_per_night = float(trip.budget) / trip_duration if trip_duration > 0 else float(trip.budget)
-                        hotels = HotelService.get_hotel_recommendations(
-                            city=trip.destination,
-                            check_in=trip.start_date.isoformat(),
-                            check_out=trip.end_date.isoformat(),
-                            budget_per_night=budget_per_night
-                        )
-                        trip_detail.hotel_data = json.dumps(hotels) if hotels else None
-
-                        # Get places of interest
-                        places = PlacesService.get_places_of_interest(
-                            trip.destination,
-                            trip.interests
-                        )
-                        trip_detail.food_data = json.dumps(places) if places else None
-
-                        trip_detail.save()
-                    except Exception as e:
-                        print(f"Error fetching details for trip {trip.id}: {str(e)}")
-                        # Continue with next trip if there's an error
-
-            return Response(data)
+            # Missing details are queued, never fetched inline
+            enqueue_missing_details(trips)
+
+            serializer = self.get_serializer(trips, many=True)
+            return self.get_paginated_response(serializer.data)
         except Exception as e:
-            print("Error listing trips:", str(e))
+            logger.exception("Error listing trips")
             return Response(
                 {"detail": "Failed to retrieve trips"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    @transaction.atomic
     def create(self, request, *args, **kwargs):
-        """Create a new trip with optional details"""
+        """Create a new trip; details are fetched by a background job"""
         try:
-            print("Received data:", request.data)
+            tracing.trace('trip.create', data=request.data)
             serializer = self.get_serializer(data=request.data)
             if not serializer.is_valid():
-                print("Validation errors:", serializer.errors)
+                logger.info("Trip validation failed: %s", serializer.errors)
                 return Response(
                     {"detail": serializer.errors},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Create the trip in a transaction
-            trip = serializer.save()
+            # Commit the trip straight away and queue its enrichment
+            with transaction.atomic():
+                trip = serializer.save()
+                enqueue_enrichment(trip)
             
-            # Get or create TripDetail
-            trip_detail, created = TripDetail.objects.get_or_create(
-                trip=trip,
-                defaults={
-                    'weather_data': None,
-                    'hotel_data': None,
-                    'food_data': None
-                }
-            )
-            
-            # Fetch fresh data for the trip
-            try:
-                weather_data = WeatherService.get_forecast(
-                    trip.destination,
-                    trip.start_date,
-                    trip.end_date
-                )
-                if weather_data:
-                    trip_detail.weather_data = json.dumps(weather_data)
-
-                trip_duration = (trip.end_date - trip.start_date).days
-                budget_per_night = float(trip.budget) / trip_duration if trip_duration > 0 else float(trip.budget)
-                hotels = HotelService.get_hotel_recommendations(
-                    city=trip.destination,
-                    check_in=trip.start_date.isoformat(),
-                    check_out=trip.end_date.isoformat(),
-                    budget_per_night=budget_per_night
-                )
-                if hotels:
-                    trip_detail.hotel_data = json.dumps(hotels)
-
-                places = PlacesService.get_places_of_interest(
-                    trip.destination,
-                    trip.interests
-                )
-                if places:
-                    trip_detail.food_data = json.dumps(places)
-
-                trip_detail.save()
-            except Exception as e:
-                print(f"Error fetching trip details: {str(e)}")
-                # Continue even if fetching details fails
-            
-            # Return the trip with details
+            # Return the trip with its (pending) details
             response_serializer = self.get_serializer(trip)
             headers = self.get_success_headers(response_serializer.data)
             
@@ -226,7 +437,7 @@ class TripViewSet(viewsets.ModelViewSet):
                 headers=headers
             )
         except Exception as e:
-            print("Error creating trip:", str(e))
+            logger.exception("Error creating trip")
             return Response(
                 {"detail": str(e)},
                 status=status.HTTP_400_BAD_REQUEST
@@ -234,15 +445,16 @@ class TripViewSet(viewsets.ModelViewSet):
 
     def destroy(self, request, *args, **kwargs):
         trip = self.get_object()
+        trip_id = trip.pk
         # Delete associated trip details first
         if hasattr(trip, 'tripdetail'):
             trip.tripdetail.delete()
         trip.delete()
+        response_cache.invalidate(trip_id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @transaction.atomic
     def update(self, request, *args, **kwargs):
-        """Update a trip and its details"""
+        """Update a trip; details are refreshed by a background job"""
         try:
             instance = self.get_object()
             serializer = self.get_serializer(instance, data=request.data, partial=kwargs.get('partial', False))
@@ -253,54 +465,23 @@ class TripViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Update the trip
-            trip = serializer.save()
-            
-            # Get or create TripDetail
-            trip_detail, created = TripDetail.objects.get_or_create(
-                trip=trip,
-                defaults={
-                    'weather_data': None,
-                    'hotel_data': None,
-                    'food_data': None
-                }
-            )
-            
-            # Fetch fresh data
-            try:
-                weather_data = WeatherService.get_forecast(
-                    trip.destination,
-                    trip.start_date,
-                    trip.end_date
-                )
-                if weather_data:
-                    trip_detail.weather_data = json.dumps(weather_data)
-
-                trip_duration = (trip.end_date - trip.start_date).days
-                budget_per_night = float(trip.budget) / trip_duration if trip_duration > 0 else float(trip.budget)
-                hotels = HotelService.get_hotel_recommendations(
-                    city=trip.destination,
-                    check_in=trip.start_date.isoformat(),
-                    check_out=trip.end_date.isoformat(),
-                    budget_per_night=budget_per_night
-                )
-                if hotels:
-                    trip_detail.hotel_data = json.dumps(hotels)
-
-                places = PlacesService.get_places_of_interest(
-                    trip.destination,
-                    trip.interests
-                )
-                if places:
-                    trip_detail.food_data = json.dumps(places)
-
-                trip_detail.save()
-            except Exception as e:
-                print(f"Error fetching trip details: {str(e)}")
+            # Only the sections that depend on a changed field are refetched
+            changed = [
+                field for field, value in serializer.validated_data.items()
+                if field != 'details' and getattr(instance, field) != value
+            ]
+            providers = TripEnrichmentService.affected_providers(changed)
+
+            # Update the trip and queue a refresh of the affected details
+            with transaction.atomic():
+                trip = serializer.save()
+                if providers:
+                    enqueue_enrichment(trip, providers)
+                transaction.on_commit(lambda: response_cache.invalidate(trip.pk))
             
             return Response(serializer.data)
         except Exception as e:
-            print("Error updating trip:", str(e))
+            logger.exception("Error updating trip")
             return Response(
                 {"detail": str(e)},
                 status=status.HTTP_400_BAD_REQUEST
@@ -318,10 +499,11 @@ class TripViewSet(viewsets.ModelViewSet):
                 trip_detail.save()
             except TripDetail.DoesNotExist:
                 TripDetail.objects.create(trip=trip, **details_data)
+            response_cache.invalidate(trip.pk)
             
             return Response({'status': 'details saved'})
         except Exception as e:
-            print("Error saving details:", str(e))
+            logger.exception("Error saving trip details")
             return Response(
                 {"detail": str(e)},
                 status=status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,149 @@
+"""
+Deterministic bulk weather generation.
+
+Every (city, day) maps to a 64-bit hash of the city and the day's ordinal,
+and temperature, condition and humidity are cut from that hash. The same
+city and day therefore always get the same forecast, which is what lets
+WeatherService cache days and lets bulk refreshes skip unchanged rows.
+
+Ranges are generated as whole columns: with NumPy installed the hash runs
+vectorized over every day of every range at once; without it a pure-Python
+loop computes the identical values.
+"""
+import hashlib
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CONDITIONS = ['Sunny', 'Cloudy', 'Rainy', 'Partly Cloudy']
+TEMPERATURE_RANGE = (18, 30)    # inclusive, degrees C
+HUMIDITY_RANGE = (40, 90)       # inclusive, percent
+
+_MASK = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+_MUL1 = 0xBF58476D1CE4E5B9
+_MUL2 = 0x94D049BB133111EB
+
+
+def city_seed(city):
+    """Stable 64-bit seed for a city name, ignoring case and extra whitespace."""
+    normalized = ' '.join(city.lower().split()).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(normalized, digest_size=8).digest(), 'little')
+
+
+def _mix(x):
+    # splitmix64 finalizer
+    z = (x + _GOLDEN) & _MASK
+    z = ((z ^ (z >> 30)) * _MUL1) & _MASK
+    z = ((z ^ (z >> 27)) * _MUL2) & _MASK
+    return z ^ (z >> 31)
+
+
+def _mix_array(x):
+    # Same as _mix(); uint64 arithmetic wraps modulo 2**64
+    z = x + np.uint64(_GOLDEN)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(_MUL1)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(_MUL2)
+    return z ^ (z >> np.uint64(31))
+
+
+class ForecastColumns:
+    """Forecasts for several ranges stored column-wise.
+
+    Day i of range r is row offsets[r] + i of the `ordinals`, `temperature`,
+    `condition` (index into CONDITIONS) and `humidity` columns. Rows only
+    become per-day dicts through forecast() / to_dicts().
+    """
+
+    def __init__(self, offsets, ordinals, temperature, condition, humidity):
+        self.offsets = offsets
+        self.ordinals = ordinals
+        self.temperature = temperature
+        self.condition = condition
+        self.humidity = humidity
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def forecast(self, index):
+        """Return range `index` as the list of per-day dicts the API serves."""
+        lo, hi = int(self.offsets[index]), int(self.offsets[index + 1])
+        return [
+            {
+                'date': date.fromordinal(ordinal).isoformat(),
+                'temperature': temperature,
+                'condition': CONDITIONS[condition],
+                'humidity': humidity,
+            }
+            for ordinal, temperature, condition, humidity in zip(
+                _tolist(self.ordinals[lo:hi]), _tolist(self.temperature[lo:hi]),
+                _tolist(self.condition[lo:hi]), _tolist(self.humidity[lo:hi]),
+            )
+        ]
+
+    def to_dicts(self):
+        return [self.forecast(index) for index in range(len(self))]
+
+
+def _tolist(column):
+    return column.tolist() if hasattr(column, 'tolist') else column
+
+
+def _columns(seeds, ordinals, offsets):
+    """Cut temperature, condition and humidity out of each row's hash."""
+    temp_lo, temp_hi = TEMPERATURE_RANGE
+    hum_lo, hum_hi = HUMIDITY_RANGE
+
+    if np is not None:
+        hashed = _mix_array(np.asarray(seeds, dtype=np.uint64) ^ np.asarray(ordinals, dtype=np.uint64))
+        temperature = (hashed % np.uint64(temp_hi - temp_lo + 1)).astype(np.int64) + temp_lo
+        condition = ((hashed >> np.uint64(16)) % np.uint64(len(CONDITIONS))).astype(np.int64)
+        humidity = ((hashed >> np.uint64(32)) % np.uint64(hum_hi - hum_lo + 1)).astype(np.int64) + hum_lo
+        return ForecastColumns(np.asarray(offsets), np.asarray(ordinals, dtype=np.int64),
+                               temperature, condition, humidity)
+
+    hashed = [_mix(seed ^ ordinal) for seed, ordinal in zip(seeds, ordinals)]
+    return ForecastColumns(
+        offsets,
+        list(ordinals),
+        [temp_lo + h % (temp_hi - temp_lo + 1) for h in hashed],
+        [(h >> 16) % len(CONDITIONS) for h in hashed],
+        [hum_lo + (h >> 32) % (hum_hi - hum_lo + 1) for h in hashed],
+    )
+
+
+def generate(ranges):
+    """Generate forecasts for many (city, start_date, end_date) ranges at once.
+
+    Dates are date objects and both ends are inclusive; an empty or inverted
+    range yields no days. Returns a ForecastColumns in the order of `ranges`.
+    """
+    ranges = list(ranges)
+    counts = [max((end - start).days + 1, 0) for _, start, end in ranges]
+    offsets = [0]
+    for count in counts:
+        offsets.append(offsets[-1] + count)
+
+    if np is not None:
+        seeds = np.repeat(np.array([city_seed(city) for city, _, _ in ranges], dtype=np.uint64), counts)
+        # Each row's ordinal is its range's start plus its position within the range
+        starts = np.repeat(np.array([start.toordinal() for _, start, _ in ranges], dtype=np.int64), counts)
+        positions = np.arange(offsets[-1], dtype=np.int64) - np.repeat(np.array(offsets[:-1], dtype=np.int64), counts)
+        return _columns(seeds, starts + positions, offsets)
+
+    seeds, ordinals = [], []
+    for (city, start, _), count in zip(ranges, counts):
+        seed, first = city_seed(city), start.toordinal()
+        seeds.extend([seed] * count)
+        ordinals.extend(range(first, first + count))
+    return _columns(seeds, ordinals, offsets)
+
+
+def generate_days(city, days):
+    """Generate the forecast for specific `days` of one city, as per-day dicts."""
+    days = list(days)
+    seed = city_seed(city)
+    return _columns([seed] * len(days), [day.toordinal() for day in days], [0, len(days)]).forecast(0)